@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache
+    
+    Holds at most max_size entries and, when max_weight is set, at most
+    max_weight total weight (e.g. bytes) across entries.
+    """
+    
+    def __init__(self, max_size: int, max_weight: Optional[int] = None):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.max_weight = max_weight
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self.total_weight = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Return the cached value for key and mark it as recently used"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return default
+    
+    def put(self, key: Hashable, value: Any, weight: int = 1) -> bool:
+        """
+        Store a value, evicting least recently used entries when full
+        
+        Returns:
+            False if the value alone exceeds max_weight and was not stored
+        """
+        if self.max_weight is not None and weight > self.max_weight:
+            return False
+        with self._lock:
+            self.total_weight -= self._weights.get(key, 0)
+            self._entries[key] = value
+            self._weights[key] = weight
+            self.total_weight += weight
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size or (
+                self.max_weight is not None and self.total_weight > self.max_weight
+            ):
+                evicted_key, _ = self._entries.popitem(last=False)
+                self.total_weight -= self._weights.pop(evicted_key)
+        return True
+    
+    def clear(self) -> None:
+        """Remove all entries and reset statistics"""
+        with self._lock:
+            self._entries.clear()
+            self._weights.clear()
+            self.total_weight = 0
+            self.hits = 0
+            self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size"""
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "max_size": self.max_size
+        }
+        if self.max_weight is not None:
+            stats["weight"] = self.total_weight
+            stats["max_weight"] = self.max_weight
+        return stats
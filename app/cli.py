@@ -0,0 +1,114 @@
+"""
+JSON Toolkit - Command Line Interface
+
+Formats, converts and queries files in bulk with the same functions the API
+uses, spread across a process pool. No web server is involved.
+
+Examples:
+    python -m app.cli format data/*.json
+    python -m app.cli convert "exports/**/*.json" -f yaml -o converted/ --workers 8
+    python -m app.cli query data/ -p '$.users[*].email'
+
+Inputs may be files, directories (searched recursively for .json, .msgpack,
+.mpk and .cbor files) or glob patterns. Results are written next to each
+input unless --output-dir is given.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+def _quiet_logging(verbose: bool = False) -> None:
+    """Keep the API's per-call debug and info logging off the terminal"""
+    logging.disable(logging.NOTSET if verbose else logging.INFO)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="json-toolkit", description="Format, convert and query JSON files in bulk")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    format_parser = commands.add_parser("format", help="Pretty-print JSON with 4-space indentation")
+    convert_parser = commands.add_parser("convert", help="Convert to another format")
+    convert_parser.add_argument("-f", "--format", required=True,
+                                choices=["json", "xml", "csv", "yaml", "msgpack", "cbor"], help="Output format")
+    query_parser = commands.add_parser("query", help="Run a JSONPath expression and write the matches")
+    query_parser.add_argument("-p", "--path", required=True, help="JSONPath expression, e.g. '$.users[*].name'")
+
+    for command_parser in (format_parser, convert_parser, query_parser):
+        command_parser.add_argument("inputs", nargs="+", help="Files, directories or glob patterns")
+        command_parser.add_argument("-o", "--output-dir", help="Directory for results (default: next to each input)")
+        command_parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1,
+                                    help="Worker processes (default: CPU count; 1 runs in-process)")
+        command_parser.add_argument("--mmap-threshold", type=int, default=1024 * 1024,
+                                    help="Memory-map inputs of at least this many bytes (default 1 MiB)")
+        command_parser.add_argument("-q", "--quiet", action="store_true", help="Only print failures")
+        command_parser.add_argument("-v", "--verbose", action="store_true", help="Show application logging")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    _quiet_logging(args.verbose)
+
+    from jsonpath_ng import parse as parse_json_path
+    from app.cli_utils import expand_inputs, output_path, process_file, summarize_results
+
+    output_format = getattr(args, "format", "json")
+    path_expression = getattr(args, "path", None)
+    if path_expression is not None:
+        # Reject a bad expression once instead of failing every file
+        try:
+            parse_json_path(path_expression)
+        except Exception as e:
+            print(f"Invalid JSONPath expression: {e}", file=sys.stderr)
+            return 2
+
+    inputs = expand_inputs(args.inputs)
+    if not inputs:
+        print("No input files matched", file=sys.stderr)
+        return 2
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    targets = [output_path(path, args.command, output_format, args.output_dir) for path in inputs]
+    if len(set(targets)) != len(targets):
+        print("Several inputs would write the same output file; use separate --output-dir runs "
+              "or write results next to the inputs", file=sys.stderr)
+        return 2
+
+    options = {
+        "command": args.command,
+        "format": output_format,
+        "path": path_expression,
+        "mmap_threshold": args.mmap_threshold
+    }
+    tasks = [(path, target, options) for path, target in zip(inputs, targets)]
+    workers = max(1, min(args.workers, len(tasks)))
+
+    start = time.perf_counter()
+    if workers == 1:
+        results = [process_file(task) for task in tasks]
+    else:
+        # Batch small files per worker round-trip to keep inter-process overhead low
+        chunksize = max(1, min(64, len(tasks) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_logging, initargs=(args.verbose,)) as executor:
+            results = list(executor.map(process_file, tasks, chunksize=chunksize))
+    summary = summarize_results(results, time.perf_counter() - start)
+
+    for result in results:
+        if result["error"] is not None:
+            print(f"FAILED {result['input']}: {result['error']}", file=sys.stderr)
+        elif not args.quiet and args.verbose:
+            print(f"{result['input']} -> {result['output']} ({result['seconds'] * 1000:.1f} ms)")
+
+    if not args.quiet:
+        print(
+            f"{summary['succeeded']}/{summary['files']} files in {summary['wall_seconds']:.2f}s with {workers} worker(s): "
+            f"{summary['files_per_second']} files/s, {summary['input_mb_per_second']} MB/s in, "
+            f"{summary['input_bytes']} bytes read, {summary['output_bytes']} bytes written"
+        )
+    return 1 if summary["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
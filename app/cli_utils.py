@@ -0,0 +1,192 @@
+import glob
+import json
+import mmap
+import os
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.format_utils import format_json
+from app.convert_utils import convert_to_xml, convert_to_csv, convert_to_yaml, convert_to_msgpack, convert_to_cbor
+from app.query_utils import query_json_path
+from app.encoding_utils import decode_binary_body
+
+# Input encoding by file extension
+INPUT_EXTENSIONS = {
+    ".json": "json",
+    ".msgpack": "msgpack",
+    ".mpk": "msgpack",
+    ".cbor": "cbor"
+}
+
+# File extension written for each output format
+OUTPUT_EXTENSIONS = {
+    "json": ".json",
+    "xml": ".xml",
+    "csv": ".csv",
+    "yaml": ".yaml",
+    "msgpack": ".msgpack",
+    "cbor": ".cbor"
+}
+
+# Suffixes of format and query results, which are never picked up as inputs
+# when a directory or glob pattern is expanded
+FORMATTED_SUFFIX = ".formatted.json"
+QUERY_SUFFIX = ".query.json"
+
+# Files at least this large are memory-mapped instead of read into memory
+DEFAULT_MMAP_THRESHOLD = 1024 * 1024
+
+def expand_inputs(patterns: Iterable[str]) -> List[str]:
+    """
+    Resolve files, directories and glob patterns to a sorted list of input files
+
+    Directories are searched recursively for files with a known input extension.
+    Patterns support '**' for recursive matching. Results of earlier format and
+    query runs written next to their inputs are skipped unless named explicitly.
+    """
+    files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.update(
+                    os.path.join(root, name) for name in names
+                    if os.path.splitext(name)[1].lower() in INPUT_EXTENSIONS and not is_previous_output(name)
+                )
+        elif glob.has_magic(pattern):
+            files.update(
+                path for path in glob.glob(pattern, recursive=True)
+                if os.path.isfile(path) and not is_previous_output(path)
+            )
+        else:
+            files.add(pattern)
+    return sorted(files)
+
+def is_previous_output(path: str) -> bool:
+    """Whether path looks like a result written by the format or query command"""
+    name = path.lower()
+    return name.endswith(FORMATTED_SUFFIX) or name.endswith(QUERY_SUFFIX)
+
+def output_path(input_path: str, command: str, output_format: str, output_dir: Optional[str] = None) -> str:
+    """
+    Path a command writes its result to
+
+    Converted files swap the extension (data.json -> data.xml); formatted and
+    query output get a '.formatted' or '.query' suffix so the input is never
+    overwritten when writing next to it.
+    """
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    if command == "format" or (command == "convert" and output_format == "json"):
+        name = stem + FORMATTED_SUFFIX
+    elif command == "query":
+        name = stem + QUERY_SUFFIX
+    else:
+        name = stem + OUTPUT_EXTENSIONS[output_format]
+    return os.path.join(output_dir if output_dir is not None else os.path.dirname(input_path), name)
+
+def load_document(path: str, mmap_threshold: int = DEFAULT_MMAP_THRESHOLD) -> Any:
+    """
+    Parse a JSON, MessagePack or CBOR file
+
+    Files of at least mmap_threshold bytes are memory-mapped. MessagePack and
+    CBOR are decoded straight from the mapping without copying it. JSON gains
+    little: json.loads needs the whole text as one str, so the mapping only
+    replaces the bytes copy of a plain read, which is freed right after
+    decoding anyway. Peak memory is still about the decoded text plus the
+    parsed document.
+
+    Raises:
+        ValueError: If the file is malformed or its extension is not supported
+    """
+    encoding = INPUT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+    if encoding is None:
+        raise ValueError(f"Unsupported input extension (expected one of: {', '.join(INPUT_EXTENSIONS)})")
+
+    with open(path, "rb") as input_file:
+        size = os.fstat(input_file.fileno()).st_size
+        if size == 0 or size < mmap_threshold:
+            return _decode_document(input_file.read(), encoding)
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return _decode_document(mapped, encoding)
+
+def _decode_document(buffer: Any, encoding: str) -> Any:
+    """Decode a bytes-like buffer holding a document in the given encoding"""
+    if encoding != "json":
+        return decode_binary_body(buffer, encoding)
+    try:
+        return json.loads(str(buffer, "utf-8-sig"))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON: {e.msg} at line {e.lineno}, column {e.colno}")
+    except UnicodeDecodeError as e:
+        raise ValueError(f"Invalid UTF-8 at byte {e.start}")
+
+def render_output(document: Any, command: str, output_format: str = "json", path_expression: Optional[str] = None) -> bytes:
+    """
+    Run a command on a parsed document using the same functions as the API
+
+    Raises:
+        ValueError: If conversion or the query fails
+    """
+    if command == "format":
+        return format_json(document).encode("utf-8")
+    if command == "query":
+        return json.dumps(query_json_path(document, path_expression), indent=2).encode("utf-8")
+
+    if output_format == "msgpack":
+        return convert_to_msgpack(document)
+    if output_format == "cbor":
+        return convert_to_cbor(document)
+    if output_format == "json":
+        converted = format_json(document)
+    elif output_format == "xml":
+        converted = convert_to_xml(document)
+    elif output_format == "csv":
+        converted = convert_to_csv(document)
+    else:
+        converted = convert_to_yaml(document)
+
+    # The text converters report failures inline rather than raising
+    if converted.startswith("Error converting to "):
+        raise ValueError(converted)
+    return converted.encode("utf-8")
+
+def process_file(task: Tuple[str, str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Process one file and write its result (runs in a worker process)
+
+    Args:
+        task: Tuple of (input path, output path, options) where options holds
+            command, format, path and mmap_threshold
+
+    Returns:
+        Dictionary with input/output paths and sizes, elapsed seconds and an
+        error message if the file failed
+    """
+    input_path, target_path, options = task
+    start = time.perf_counter()
+    result = {"input": input_path, "output": target_path, "input_bytes": 0, "output_bytes": 0, "error": None}
+    try:
+        result["input_bytes"] = os.path.getsize(input_path)
+        document = load_document(input_path, options["mmap_threshold"])
+        output = render_output(document, options["command"], options["format"], options["path"])
+        with open(target_path, "wb") as output_file:
+            output_file.write(output)
+        result["output_bytes"] = len(output)
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+def summarize_results(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """Aggregate per-file results into totals and throughput"""
+    succeeded = [result for result in results if result["error"] is None]
+    input_bytes = sum(result["input_bytes"] for result in succeeded)
+    output_bytes = sum(result["output_bytes"] for result in succeeded)
+    return {
+        "files": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "input_bytes": input_bytes,
+        "output_bytes": output_bytes,
+        "wall_seconds": round(wall_seconds, 3),
+        "files_per_second": round(len(succeeded) / wall_seconds, 1) if wall_seconds > 0 else None,
+        "input_mb_per_second": round(input_bytes / 1048576 / wall_seconds, 2) if wall_seconds > 0 else None
+    }
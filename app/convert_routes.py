@@ -1,23 +1,58 @@
-from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import ValidationError
+from typing import Any, Iterator, Optional, Tuple
+import csv
+import io
+import itertools
 import json
+import os
+import tempfile
+import xml.etree.ElementTree as ET
+import yaml
 from app.models import JsonRequest
-from app.convert_utils import convert_to_xml, convert_to_csv, convert_to_yaml
-from app.format_utils import format_json
+from app.convert_utils import (
+    convert_to_xml, convert_to_csv, convert_to_yaml, convert_to_msgpack, convert_to_cbor,
+    build_csv_rows, iter_csv_chunks,
+    iter_csv_records, iter_xml_records, iter_yaml_documents, iter_json_array
+)
+from app.encoding_utils import (
+    get_body_encoding, decode_binary_body, wants_raw_response, varies_on_accept, BINARY_MEDIA_TYPES, TEXT_MEDIA_TYPES
+)
+from app.format_utils import format_json, iter_json_chunks
 from app.error_utils import parse_json_error_details, format_json_error_message
 from app.logging_config import logger
 from app.logging_utils import log_request_payload, log_response_payload
+from app.profiling_utils import ProfiledIterator, profile_in_threadpool
 
 router = APIRouter()
 
+# Content-Type values accepted for each input format of /convert/to-json
+INPUT_FORMAT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/xml": "xml",
+    "text/xml": "xml",
+    "application/yaml": "yaml",
+    "application/x-yaml": "yaml",
+    "text/yaml": "yaml",
+    "text/x-yaml": "yaml"
+}
+
+# Request bodies larger than this are spooled to disk while parsing
+SPOOL_MAX_MEMORY = int(os.getenv('CONVERT_SPOOL_MAX_MEMORY', str(10 * 1024 * 1024)))
+
 @router.post("/convert")
 async def convert_json_endpoint(
     request: Request,
-    format: str = Query("json", description="Output format: json, xml, csv, yaml")
+    response: Response,
+    format: str = Query("json", description="Output format: json, xml, csv, yaml, msgpack, cbor"),
+    raw: Optional[bool] = Query(None, description="Return the converted data as the response body instead of a JSON envelope")
 ):
     """Convert JSON to specified format"""
     # Validate format parameter
-    valid_formats = ["json", "xml", "csv", "yaml"]
+    valid_formats = ["json", "xml", "csv", "yaml", "msgpack", "cbor"]
     if format not in valid_formats:
         logger.error("Invalid format requested", format=format, valid_formats=valid_formats)
         raise HTTPException(
@@ -32,13 +67,29 @@ async def convert_json_endpoint(
     try:
         # Get raw body to parse JSON manually for better error messages
         body = await request.body()
-        json_string = body.decode('utf-8')
+        encoding = get_body_encoding(request.headers.get("content-type"))
+        
+        logger.info("Convert request started", format=format, data_size=len(body), encoding=encoding)
         
-        logger.info("Convert request started", format=format, data_size=len(json_string))
+        if encoding != "json":
+            try:
+                parsed_json = decode_binary_body(body, encoding)
+            except ValueError as decode_error:
+                logger.error("Binary decoding error in convert", format=format, encoding=encoding, error=str(decode_error))
+                raise HTTPException(
+                    status_code=422,
+                    detail={
+                        "error": f"Invalid {encoding} data",
+                        "message": str(decode_error),
+                        "type": "validation"
+                    }
+                )
         
         try:
             # Parse JSON to get detailed error if it fails
-            parsed_json = json.loads(json_string)
+            if encoding == "json":
+                json_string = body.decode('utf-8')
+                parsed_json = json.loads(json_string)
             log_request_payload(parsed_json, f"convert_request_{format}")
         except json.JSONDecodeError as json_error:
             # Extract detailed error information
@@ -63,6 +114,14 @@ async def convert_json_endpoint(
             )
         
         try:
+            # Caches must not serve the envelope to clients that negotiated the raw body, or vice versa
+            vary_headers = {"Vary": "Accept"} if varies_on_accept(format, raw) else {}
+            response.headers.update(vary_headers)
+            if format not in BINARY_MEDIA_TYPES and wants_raw_response(request.headers.get("accept"), format, raw):
+                raw_response = raw_converted_response(parsed_json, format)
+                raw_response.headers.update(vary_headers)
+                return raw_response
+            
             # Call appropriate conversion function based on format
             if format == "json":
                 converted_data = format_json(parsed_json)
@@ -72,6 +131,26 @@ async def convert_json_endpoint(
                 converted_data = convert_to_csv(parsed_json)
             elif format == "yaml":
                 converted_data = convert_to_yaml(parsed_json)
+            elif format == "msgpack":
+                try:
+                    converted_data = convert_to_msgpack(parsed_json)
+                except ValueError as e:
+                    raise HTTPException(
+                        status_code=422,
+                        detail={
+                            "error": "Unsupported value",
+                            "message": str(e),
+                            "type": "validation"
+                        }
+                    )
+            elif format == "cbor":
+                converted_data = convert_to_cbor(parsed_json)
+            
+            if format in BINARY_MEDIA_TYPES:
+                # Binary formats are returned as the raw body rather than a JSON envelope
+                log_response_payload({"format": format, "size": len(converted_data)}, f"convert_response_{format}")
+                logger.info("Convert request completed", format=format, success=True, output_size=len(converted_data))
+                return Response(content=converted_data, media_type=BINARY_MEDIA_TYPES[format])
             
             response_data = {
                 "converted_data": converted_data,
@@ -83,6 +162,8 @@ async def convert_json_endpoint(
             
             logger.info("Convert request completed", format=format, success=True)
             return response_data
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error("Convert request failed", format=format, error=str(e), exc_info=True)
             raise HTTPException(
@@ -105,3 +186,144 @@ async def convert_json_endpoint(
                 "type": "server"
             }
         )
+
+def raw_converted_response(parsed_json: Any, format: str) -> Response:
+    """
+    Return converted data directly with its own media type
+    
+    JSON and CSV are streamed in chunks; XML and YAML are rendered in full
+    because their converters build the whole document at once.
+    
+    Raises:
+        Exception: Whatever the converter raised, for the caller to report as a 500
+    """
+    media_type = TEXT_MEDIA_TYPES[format][0]
+    
+    if format == "json":
+        response = StreamingResponse(ProfiledIterator(iter_json_chunks(parsed_json)), media_type=media_type)
+    elif format == "csv":
+        # Flatten up front so conversion errors surface before streaming starts
+        fieldnames, rows = build_csv_rows(parsed_json)
+        chunks = iter_csv_chunks(fieldnames, rows) if rows else iter([])
+        response = StreamingResponse(ProfiledIterator(chunks), media_type=media_type)
+    elif format == "xml":
+        # Raise rather than send the inline error string as a 200 XML or YAML body
+        response = Response(content=convert_to_xml(parsed_json, raise_errors=True), media_type=media_type)
+    else:
+        response = Response(content=convert_to_yaml(parsed_json, raise_errors=True), media_type=media_type)
+    
+    log_response_payload({"format": format, "raw": True}, f"convert_response_{format}")
+    logger.info("Convert request completed", format=format, success=True, raw=True)
+    return response
+
+@router.post("/convert/to-json")
+async def convert_to_json_endpoint(
+    request: Request,
+    input_format: Optional[str] = Query(None, description="Input format: csv, xml, yaml (defaults to the Content-Type)"),
+    infer_types: bool = Query(False, description="Convert numeric, boolean and empty values to JSON types"),
+    infer_rows: int = Query(1000, ge=1, le=1000000, description="CSV rows sampled to infer column types"),
+    unflatten: bool = Query(True, description="Rebuild nested objects from dot/bracket CSV headers"),
+    drop_empty: bool = Query(False, description="Omit empty CSV cells")
+):
+    """Convert CSV, XML or YAML to JSON, streaming the result"""
+    if input_format is None:
+        content_type = request.headers.get("content-type", "")
+        input_format = INPUT_FORMAT_CONTENT_TYPES.get(content_type.split(";")[0].strip().lower())
+    
+    valid_formats = ["csv", "xml", "yaml"]
+    if input_format not in valid_formats:
+        logger.error("Invalid input format requested", input_format=input_format, valid_formats=valid_formats)
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "error": "Invalid input format",
+                "message": f"Invalid input format. Must be one of: {', '.join(valid_formats)} (set input_format or Content-Type)",
+                "type": "validation"
+            }
+        )
+    
+    # Spool the body so parsing reads it incrementally without holding it all in memory
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY)
+    data_size = 0
+    async for chunk in request.stream():
+        spool.write(chunk)
+        data_size += len(chunk)
+    spool.seek(0)
+    
+    logger.info("Convert to JSON request started", input_format=input_format, data_size=data_size, infer_types=infer_types)
+    
+    if input_format == "xml":
+        source = spool
+        records = iter_xml_records(source, infer_types=infer_types)
+    else:
+        source = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="" if input_format == "csv" else None)
+        if input_format == "csv":
+            records = iter_csv_records(source, infer_types=infer_types, infer_rows=infer_rows,
+                                       unflatten=unflatten, drop_empty=drop_empty)
+        else:
+            records = iter_yaml_documents(source)
+    
+    try:
+        first_chunk, chunks = await run_in_threadpool(_start_conversion, records, input_format)
+    except (csv.Error, ET.ParseError, yaml.YAMLError, ValueError) as e:
+        source.close()
+        logger.error("Input parsing error in convert to JSON", input_format=input_format, error=str(e))
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": f"Invalid {input_format.upper()}",
+                "message": str(e),
+                "type": "validation"
+            }
+        )
+    except Exception as e:
+        source.close()
+        logger.error("Unexpected error in convert to JSON", input_format=input_format, error=str(e), exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Unexpected error",
+                "message": str(e),
+                "type": "server"
+            }
+        )
+    
+    return StreamingResponse(
+        ProfiledIterator(_stream_converted(itertools.chain([first_chunk], chunks), source, input_format)),
+        media_type="application/json"
+    )
+
+@profile_in_threadpool
+def _start_conversion(records: Iterator[Any], input_format: str) -> Tuple[str, Iterator[str]]:
+    """
+    Convert records up to the first JSON output chunk (about 64 KiB)
+    
+    Malformed input found this far raises here, before the response starts, so
+    it gets a proper error status. Errors after that can only abort the stream.
+    
+    Returns:
+        Tuple of (first chunk, iterator over the remaining chunks)
+    """
+    head = list(itertools.islice(records, 2 if input_format == "yaml" else 1))
+    if input_format == "yaml" and len(head) == 1:
+        # A single YAML document converts to that document rather than an array
+        chunks = iter([json.dumps(head[0], indent=4, allow_nan=False)])
+    else:
+        chunks = iter_json_array(itertools.chain(head, records))
+    return next(chunks), chunks
+
+def _stream_converted(chunks: Iterator[str], source: Any, input_format: str) -> Iterator[bytes]:
+    """Encode converted chunks and release the spooled input when streaming ends"""
+    output_size = 0
+    try:
+        for chunk in chunks:
+            encoded = chunk.encode("utf-8")
+            output_size += len(encoded)
+            yield encoded
+        logger.info("Convert to JSON request completed", input_format=input_format, output_size=output_size, success=True)
+    except Exception as e:
+        # Headers are already sent, so the only signal left is an aborted response
+        logger.error("Convert to JSON stream failed", input_format=input_format, error=str(e), exc_info=True)
+        raise
+    finally:
+        source.close()
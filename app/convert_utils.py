@@ -1,12 +1,37 @@
 import csv
 import io
+import json
+import math
+import numbers
+import re
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable as IterableABC
+from functools import lru_cache
+import cbor2
+import msgpack
 import yaml
-from dicttoxml import dicttoxml
-from typing import Any, Dict, List
+from dicttoxml import make_attrstring, make_valid_xml_name
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from app.encoding_utils import ensure_json_compatible
 from app.logging_config import logger
 
-def convert_to_xml(json_data: Any) -> str:
-    """Convert JSON to XML format"""
+# Tag dicttoxml uses for list elements
+XML_ITEM_TAG = "item"
+
+INT_PATTERN = re.compile(r'-?(?:0|[1-9][0-9]*)')
+FLOAT_PATTERN = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?')
+FLAT_KEY_PART_PATTERN = re.compile(r'^(.*?)((?:\[[0-9]+\])*)$')
+
+# Unassigned array slot while unflattening CSV keys
+_HOLE = object()
+
+def convert_to_xml(json_data: Any, raise_errors: bool = False) -> str:
+    """
+    Convert JSON to XML format
+
+    Failures are returned as an "Error converting to XML" string unless
+    raise_errors is set.
+    """
     logger.debug("Converting to XML", data_type=type(json_data).__name__)
     
     try:
@@ -17,8 +42,7 @@ def convert_to_xml(json_data: Any) -> str:
             parsed = json_data
         
         # Convert to XML
-        xml_bytes = dicttoxml(parsed, custom_root='root', attr_type=False)
-        xml_str = xml_bytes.decode('utf-8')
+        xml_str = render_xml(parsed)
         
         # Format XML with proper indentation
         import xml.dom.minidom
@@ -32,8 +56,71 @@ def convert_to_xml(json_data: Any) -> str:
         return result
     except Exception as e:
         logger.error("XML conversion failed", error=str(e))
+        if raise_errors:
+            raise
         return f"Error converting to XML: {str(e)}"
 
+def render_xml(data: Any) -> str:
+    """
+    Render data as unindented XML, identical to dicttoxml(data, custom_root='root', attr_type=False)
+    
+    dicttoxml logs every element it builds, which dominates its run time while
+    the root logger is at DEBUG. Element names still come from dicttoxml's own
+    name rules and are cached per key.
+    """
+    if type(data) == bool or data is None or isinstance(data, numbers.Number) or type(data) is str or hasattr(data, 'isoformat'):
+        body = _xml_value(XML_ITEM_TAG, "", data, in_list=False)
+    elif isinstance(data, (dict, IterableABC)):
+        body = _xml_content(data)
+    else:
+        raise TypeError('Unsupported data type: %s (%s)' % (data, type(data).__name__))
+    return f'<?xml version="1.0" encoding="UTF-8" ?><root>{body}</root>'
+
+@lru_cache(maxsize=4096)
+def _xml_name(key: Any) -> Tuple[str, str]:
+    """Valid element name and attribute string for a key, as dicttoxml makes them"""
+    name, attributes = make_valid_xml_name(key, {})
+    return name, make_attrstring(attributes)
+
+def _escape_xml(value: Any) -> str:
+    """Escape text like dicttoxml's escape_xml, which leaves non-strings unchanged"""
+    if type(value) is not str:
+        return f"{value}"
+    return value.replace('&', '&amp;').replace('"', '&quot;').replace('\'', '&apos;').replace('<', '&lt;').replace('>', '&gt;')
+
+def _xml_content(container: Any) -> str:
+    """Markup for the children of an object or array"""
+    if isinstance(container, dict):
+        parts = []
+        for child_key, value in container.items():
+            name, attributes = _xml_name(child_key)
+            parts.append(_xml_value(name, attributes, value, in_list=False))
+    else:
+        parts = [_xml_value(XML_ITEM_TAG, "", item, in_list=True) for item in container]
+    return "".join(parts)
+
+def _xml_value(name: str, attributes: str, value: Any, in_list: bool) -> str:
+    """
+    Markup for one element, following dicttoxml's type dispatch
+    
+    dicttoxml checks numbers before booleans inside arrays, so booleans in
+    arrays render as True/False while those in objects render as true/false.
+    """
+    if type(value) == bool and not in_list:
+        return f"<{name}{attributes}>{str(value).lower()}</{name}>"
+    if isinstance(value, numbers.Number) or type(value) is str:
+        return f"<{name}{attributes}>{_escape_xml(value)}</{name}>"
+    if hasattr(value, 'isoformat'):
+        return f"<{name}{attributes}>{_escape_xml(value.isoformat())}</{name}>"
+    if isinstance(value, dict):
+        return f"<{name}{attributes}>{_xml_content(value)}</{name}>"
+    if isinstance(value, IterableABC):
+        # dicttoxml leaves a space after the tag name of arrays nested in arrays
+        return f"<{name}{' ' if in_list else ''}{attributes}>{_xml_content(value)}</{name}>"
+    if value is None:
+        return f"<{name}{attributes}></{name}>"
+    raise TypeError('Unsupported data type: %s (%s)' % (value, type(value).__name__))
+
 def convert_to_csv(json_data: Any) -> str:
     """Convert JSON to CSV format with flattened nested objects"""
     logger.debug("Converting to CSV", data_type=type(json_data).__name__)
@@ -45,62 +132,62 @@ def convert_to_csv(json_data: Any) -> str:
         else:
             parsed = json_data
         
-        # Handle different input types
-        if isinstance(parsed, list):
-            # Array of objects
-            if not parsed:
-                return "No data to convert"
-            
-            # Flatten all objects
-            flattened_data = []
-            for item in parsed:
-                if isinstance(item, dict):
-                    flattened_data.append(flatten_dict(item))
-                else:
-                    flattened_data.append({"value": str(item)})
-            
-            # Get all unique keys
-            all_keys = set()
-            for item in flattened_data:
-                all_keys.update(item.keys())
-            
-            # Create CSV
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=sorted(all_keys))
-            writer.writeheader()
-            writer.writerows(flattened_data)
-            result = output.getvalue()
-            logger.debug("CSV conversion successful", output_size=len(result), rows=len(flattened_data))
-            return result
-            
-        elif isinstance(parsed, dict):
-            # Single object
-            flattened = flatten_dict(parsed)
-            
-            output = io.StringIO()
-            writer = csv.DictWriter(output, fieldnames=sorted(flattened.keys()))
-            writer.writeheader()
-            writer.writerow(flattened)
-            result = output.getvalue()
-            logger.debug("CSV conversion successful", output_size=len(result), rows=1)
-            return result
-            
-        else:
-            # Primitive value
-            output = io.StringIO()
-            writer = csv.writer(output)
-            writer.writerow(["value"])
-            writer.writerow([str(parsed)])
-            result = output.getvalue()
-            logger.debug("CSV conversion successful", output_size=len(result), rows=1)
-            return result
+        if isinstance(parsed, list) and not parsed:
+            return "No data to convert"
+        
+        fieldnames, rows = build_csv_rows(parsed)
+        result = "".join(iter_csv_chunks(fieldnames, rows))
+        logger.debug("CSV conversion successful", output_size=len(result), rows=len(rows))
+        return result
             
     except Exception as e:
         logger.error("CSV conversion failed", error=str(e))
         return f"Error converting to CSV: {str(e)}"
 
-def convert_to_yaml(json_data: Any) -> str:
-    """Convert JSON to YAML format"""
+def build_csv_rows(parsed: Any) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Flatten JSON data into CSV column names and rows
+    
+    Arrays become one row per item, objects a single row and primitives a
+    single 'value' column. Nested objects are flattened with flatten_dict.
+    """
+    if isinstance(parsed, list):
+        rows = []
+        all_keys = set()
+        for item in parsed:
+            row = flatten_dict(item) if isinstance(item, dict) else {"value": str(item)}
+            all_keys.update(row.keys())
+            rows.append(row)
+        return sorted(all_keys), rows
+    
+    if isinstance(parsed, dict):
+        flattened = flatten_dict(parsed)
+        return sorted(flattened.keys()), [flattened]
+    
+    return ["value"], [{"value": str(parsed)}]
+
+def iter_csv_chunks(fieldnames: List[str], rows: Iterable[Dict[str, Any]], chunk_size: int = 65536) -> Iterator[str]:
+    """Write CSV rows, yielding chunks of roughly chunk_size characters"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if output.tell() >= chunk_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+    remaining = output.getvalue()
+    if remaining:
+        yield remaining
+
+def convert_to_yaml(json_data: Any, raise_errors: bool = False) -> str:
+    """
+    Convert JSON to YAML format
+
+    Failures are returned as an "Error converting to YAML" string unless
+    raise_errors is set.
+    """
     logger.debug("Converting to YAML", data_type=type(json_data).__name__)
     
     try:
@@ -116,8 +203,56 @@ def convert_to_yaml(json_data: Any) -> str:
         return yaml_str
     except Exception as e:
         logger.error("YAML conversion failed", error=str(e))
+        if raise_errors:
+            raise
         return f"Error converting to YAML: {str(e)}"
 
+def convert_to_msgpack(json_data: Any) -> bytes:
+    """
+    Convert JSON to MessagePack binary format
+
+    Raises:
+        ValueError: If an integer does not fit in 64 bits
+    """
+    logger.debug("Converting to MessagePack", data_type=type(json_data).__name__)
+    
+    try:
+        if isinstance(json_data, str):
+            import json
+            parsed = json.loads(json_data)
+        else:
+            parsed = json_data
+        
+        result = msgpack.packb(parsed, use_bin_type=True)
+        logger.debug("MessagePack conversion successful", output_size=len(result))
+        return result
+    except OverflowError:
+        # MessagePack integers are limited to 64 bits, unlike JSON's
+        logger.error("MessagePack conversion failed", error="integer out of range")
+        raise ValueError("integer out of MessagePack range")
+    except Exception as e:
+        # Binary output has no room for an inline error string, so let the route report it
+        logger.error("MessagePack conversion failed", error=str(e))
+        raise
+
+def convert_to_cbor(json_data: Any) -> bytes:
+    """Convert JSON to CBOR binary format"""
+    logger.debug("Converting to CBOR", data_type=type(json_data).__name__)
+    
+    try:
+        if isinstance(json_data, str):
+            import json
+            parsed = json.loads(json_data)
+        else:
+            parsed = json_data
+        
+        result = cbor2.dumps(parsed)
+        logger.debug("CBOR conversion successful", output_size=len(result))
+        return result
+    except Exception as e:
+        logger.error("CBOR conversion failed", error=str(e))
+        raise
+
 def flatten_dict(d: Dict, parent_key: str = '', sep: str = '.') -> Dict:
     """Helper function to flatten nested dictionaries"""
     items = []
@@ -139,3 +274,302 @@ def flatten_dict(d: Dict, parent_key: str = '', sep: str = '.') -> Dict:
         else:
             items.append((new_key, v))
     return dict(items)
+
+def unflatten_dict(flat: Dict[str, Any], sep: str = '.', max_index: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Rebuild nested objects from keys produced by flatten_dict
+
+    'address.city' becomes {"address": {"city": ...}} and 'items[0].id' becomes
+    {"items": [{"id": ...}]}. A key is kept flat under its original name when it
+    conflicts with another key (e.g. 'a.b' alongside 'a' or an earlier 'a.b.c')
+    or has an array index of at least max_index (default: the number of keys).
+    Rebuilt names never contain sep or end in an index, so a flat key cannot
+    overwrite one.
+    """
+    split_keys = [(flat_key, _split_flat_key(flat_key, sep), value) for flat_key, value in flat.items()]
+    # Plain keys always keep their value, so nested keys under the same name stay flat
+    plain_keys = {tokens[0] for _, tokens, _ in split_keys if len(tokens) == 1}
+    # Padding is bounded by the row width, not by whatever index a header names
+    if max_index is None:
+        max_index = len(flat)
+
+    result: Dict[str, Any] = {}
+    padded: Dict[int, List[Any]] = {}
+    for flat_key, tokens, value in split_keys:
+        if len(tokens) == 1:
+            result[flat_key] = value
+        elif not (
+            tokens
+            and tokens[0] not in plain_keys
+            and all(token < max_index for token in tokens if isinstance(token, int))
+            and _assign_path(result, tokens, value, padded)
+        ):
+            result[flat_key] = value
+
+    for items in padded.values():
+        items[:] = [None if item is _HOLE else item for item in items]
+    return result
+
+def _split_flat_key(flat_key: str, sep: str) -> List[Any]:
+    """Split 'a.b[0].c' into ['a', 'b', 0, 'c']"""
+    tokens: List[Any] = []
+    for part in flat_key.split(sep):
+        name, indexes = FLAT_KEY_PART_PATTERN.match(part).groups()
+        if name:
+            tokens.append(name)
+        elif not tokens or not indexes:
+            # Empty segment or a key starting with an index
+            return []
+        if indexes:
+            tokens.extend(int(index) for index in indexes[1:-1].split(']['))
+    return tokens
+
+def _assign_path(root: Dict[str, Any], tokens: List[Any], value: Any, padded: Dict[int, List[Any]]) -> bool:
+    """
+    Set value at tokens inside root, creating containers; False on conflict
+
+    Nothing already assigned is replaced. Arrays are padded with _HOLE up to
+    the index being set and recorded in padded, so the caller can turn the
+    holes into nulls once every key is in place.
+    """
+    container: Any = root
+    for token, next_token in zip(tokens, tokens[1:]):
+        child_type = list if isinstance(next_token, int) else dict
+        if isinstance(token, int):
+            if not isinstance(container, list):
+                return False
+            _pad_list(container, token, padded)
+            if container[token] is _HOLE:
+                container[token] = child_type()
+            child = container[token]
+        else:
+            if not isinstance(container, dict):
+                return False
+            child = container.setdefault(token, child_type())
+        if not isinstance(child, child_type):
+            return False
+        container = child
+
+    last = tokens[-1]
+    if isinstance(last, int):
+        if not isinstance(container, list):
+            return False
+        _pad_list(container, last, padded)
+        if container[last] is not _HOLE:
+            return False
+        container[last] = value
+    else:
+        if not isinstance(container, dict) or last in container:
+            return False
+        container[last] = value
+    return True
+
+def _pad_list(items: List[Any], index: int, padded: Dict[int, List[Any]]) -> None:
+    """Extend items with holes so index is in range"""
+    if index >= len(items):
+        items.extend([_HOLE] * (index + 1 - len(items)))
+        padded[id(items)] = items
+
+def infer_scalar_type(value: str) -> str:
+    """Classify a text value as int, float, bool, null or str"""
+    if value == "":
+        return "null"
+    if INT_PATTERN.fullmatch(value):
+        return "int"
+    if FLOAT_PATTERN.fullmatch(value):
+        return "float"
+    if value.lower() in ("true", "false"):
+        return "bool"
+    return "str"
+
+def coerce_scalar(value: str, value_type: str) -> Any:
+    """
+    Convert a text value to value_type
+
+    Empty values become None unless the type is str, and values that do not
+    fit the type are returned unchanged.
+    """
+    if value == "":
+        return "" if value_type == "str" else None
+    if value_type == "int" and INT_PATTERN.fullmatch(value):
+        return int(value)
+    if value_type == "float" and FLOAT_PATTERN.fullmatch(value):
+        number = float(value)
+        # Exponents like 1e999 overflow to infinity, which JSON cannot represent
+        return number if math.isfinite(number) else value
+    if value_type == "bool" and value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+def infer_column_types(rows: List[Dict[str, str]], fieldnames: List[str]) -> Dict[str, str]:
+    """
+    Infer one type per column from a batch of CSV rows
+
+    A column is int, float or bool only if every non-empty value in the batch
+    fits; ints widen to float, anything else falls back to str.
+    """
+    column_types = {}
+    for field in fieldnames:
+        column_type = "null"
+        for row in rows:
+            value_type = infer_scalar_type(row.get(field) or "")
+            if value_type == "null" or value_type == column_type:
+                continue
+            if column_type == "null":
+                column_type = value_type
+            elif {column_type, value_type} == {"int", "float"}:
+                column_type = "float"
+            else:
+                column_type = "str"
+                break
+        column_types[field] = column_type
+    return column_types
+
+def iter_csv_records(stream: IO[str], infer_types: bool = False, infer_rows: int = 1000,
+                     unflatten: bool = True, drop_empty: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Parse CSV row by row into JSON objects
+
+    Args:
+        stream: Text stream positioned at the header row
+        infer_types: Convert numeric, boolean and empty cells to JSON types
+        infer_rows: Number of leading rows used to infer column types
+        unflatten: Rebuild nested objects from flatten_dict style headers
+        drop_empty: Omit empty cells instead of emitting empty strings
+
+    Yields:
+        One object per data row
+    """
+    reader = csv.DictReader(stream)
+    fieldnames = reader.fieldnames or []
+    logger.debug("Parsing CSV", columns=len(fieldnames), infer_types=infer_types, unflatten=unflatten)
+
+    column_types = None
+    if infer_types:
+        # Types are fixed from the first batch so every row gets the same schema
+        batch = []
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= infer_rows:
+                break
+        column_types = infer_column_types(batch, fieldnames)
+        logger.debug("CSV column types inferred", sample_rows=len(batch), column_types=column_types)
+        rows: Iterable[Dict[str, str]] = _chain_rows(batch, reader)
+    else:
+        rows = reader
+
+    for row in rows:
+        record = {}
+        for field in fieldnames:
+            value = row.get(field)
+            if value is None:
+                value = ""
+            if drop_empty and value == "":
+                continue
+            record[field] = coerce_scalar(value, column_types[field]) if column_types else value
+        # Cap indexes by the header width so every row nests the same columns
+        yield unflatten_dict(record, max_index=len(fieldnames)) if unflatten else record
+
+def _chain_rows(batch: List[Dict[str, str]], reader: Iterator[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+    """Yield the buffered inference batch, releasing it, then the remaining rows"""
+    batch.reverse()
+    while batch:
+        yield batch.pop()
+    yield from reader
+
+def xml_element_to_value(element: ET.Element, infer_types: bool = False) -> Any:
+    """
+    Convert an XML element to JSON data
+
+    Leaf elements become their text, elements whose children are all <item>
+    (dicttoxml's list encoding) become arrays, and other elements become
+    objects. Attributes are stored under '@name' keys and text mixed with
+    child elements under '#text'. Repeated child tags become arrays.
+    """
+    children = list(element)
+    text = (element.text or "").strip()
+
+    if not children and not element.attrib:
+        return coerce_scalar(text, infer_scalar_type(text)) if infer_types else text
+
+    if children and not element.attrib and all(child.tag == XML_ITEM_TAG for child in children):
+        return [xml_element_to_value(child, infer_types) for child in children]
+
+    result: Dict[str, Any] = {f"@{name}": value for name, value in element.attrib.items()}
+    repeated = set()
+    for child in children:
+        value = xml_element_to_value(child, infer_types)
+        if child.tag in repeated:
+            result[child.tag].append(value)
+        elif child.tag in result:
+            result[child.tag] = [result[child.tag], value]
+            repeated.add(child.tag)
+        else:
+            result[child.tag] = value
+    if text:
+        result["#text"] = coerce_scalar(text, infer_scalar_type(text)) if infer_types else text
+    return result
+
+def iter_xml_records(stream: IO[bytes], infer_types: bool = False) -> Iterator[Any]:
+    """
+    Parse XML element by element, yielding each child of the root element
+
+    <item> children yield their value directly; other children yield
+    {tag: value}. Each record is detached from the tree once converted, so
+    memory is bounded by the largest record rather than the whole document.
+    """
+    depth = 0
+    root = None
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1:
+            value = xml_element_to_value(element, infer_types)
+            yield value if element.tag == XML_ITEM_TAG else {element.tag: value}
+            root.remove(element)
+
+class _JsonYamlLoader(yaml.SafeLoader):
+    """SafeLoader that keeps timestamps as written, since JSON has no date type"""
+
+_JsonYamlLoader.add_constructor("tag:yaml.org,2002:timestamp", yaml.SafeLoader.construct_yaml_str)
+
+def iter_yaml_documents(stream: IO[str]) -> Iterator[Any]:
+    """
+    Parse a YAML stream one document at a time, leaving dates and times as strings
+
+    Number, boolean and null keys are allowed, since JSON output writes them as
+    strings (e.g. HTTP status codes in OpenAPI documents).
+
+    Raises:
+        ValueError: If a document holds a value JSON cannot represent, such as
+            !!binary data or .nan and .inf
+    """
+    for index, document in enumerate(yaml.load_all(stream, Loader=_JsonYamlLoader), start=1):
+        try:
+            ensure_json_compatible(document, allow_scalar_keys=True, allow_nan=False)
+        except ValueError as e:
+            raise ValueError(f"YAML document {index}: {e}")
+        yield document
+
+def iter_json_array(records: Iterable[Any], chunk_size: int = 65536) -> Iterator[str]:
+    """Serialize records as a JSON array, yielding chunks of roughly chunk_size characters"""
+    buffer = ["["]
+    buffered = 1
+    first = True
+    for record in records:
+        piece = json.dumps(record, allow_nan=False)
+        piece = piece if first else "," + piece
+        first = False
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    buffer.append("]")
+    yield "".join(buffer)
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException
+from app.models import DiffRequest
+from app.diff_utils import diff_json
+from app.logging_config import logger
+from app.logging_utils import log_request_payload, log_response_payload
+from app.profiling_utils import profile_in_threadpool
+
+router = APIRouter()
+
+@router.post("/diff")
+@profile_in_threadpool
+def diff_json_endpoint(request: DiffRequest):
+    """Compare two JSON documents and return an RFC 6902 JSON Patch"""
+    logger.info("Diff request started",
+                array_key=request.array_key,
+                max_operations=request.max_operations,
+                max_patch_bytes=request.max_patch_bytes)
+    
+    # Log request payload (sanitized and conditional)
+    log_request_payload({"source": request.source, "target": request.target}, "diff_request")
+    
+    try:
+        response_data = diff_json(
+            request.source,
+            request.target,
+            array_key=request.array_key,
+            max_operations=request.max_operations,
+            max_patch_bytes=request.max_patch_bytes
+        )
+        response_data["identical"] = response_data["operation_count"] == 0 and not response_data["truncated"]
+        
+        # Log response payload (sanitized and conditional)
+        log_response_payload(response_data, "diff_response")
+        
+        logger.info("Diff request completed",
+                   operations=response_data["operation_count"],
+                   truncated=response_data["truncated"],
+                   success=True)
+        return response_data
+        
+    except RecursionError:
+        logger.error("Diff request failed", error="Document nesting too deep", exc_info=True)
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Invalid input",
+                "message": "Documents are nested too deeply to diff",
+                "type": "validation"
+            }
+        )
+    except Exception as e:
+        logger.error("Diff request failed", error=str(e), exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Processing error",
+                "message": str(e),
+                "type": "server"
+            }
+        )
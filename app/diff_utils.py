@@ -0,0 +1,364 @@
+import struct
+from collections import defaultdict, deque
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.logging_config import logger
+from app.pointer_utils import escape_pointer_token
+
+# Object keys tried, in order, when matching array elements by identity
+DEFAULT_ARRAY_KEYS = ("id", "_id", "uuid", "key", "name")
+
+# Bytes in each subtree digest; 128 bits makes accidental collisions negligible
+DIGEST_SIZE = 16
+
+_FLOAT_STRUCT = struct.Struct("<d")
+_LENGTH_STRUCT = struct.Struct("<Q")
+
+_MISSING = object()
+
+class DiffLimitExceeded(Exception):
+    """Raised internally when the patch grows past its operation or size cap"""
+
+class _Fenwick:
+    """Binary indexed tree over 0..size-1 counting elements still in place"""
+
+    def __init__(self, size: int):
+        self.size = size
+        # Every slot starts at 1, so node i covers exactly lowbit(i) elements
+        self.tree = [i & -i for i in range(size + 1)]
+
+    def remove(self, index: int) -> None:
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] -= 1
+            i += i & -i
+
+    def count_before(self, index: int) -> int:
+        total = 0
+        i = index
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+def _length_prefixed(data: bytes) -> bytes:
+    return _LENGTH_STRUCT.pack(len(data)) + data
+
+def _scalar_encoding(value: Any) -> bytes:
+    """
+    Self-delimiting, type-tagged encoding of a JSON scalar
+
+    Equal encodings mean equal values of the same type, so 1, 1.0 and True
+    stay distinct.
+    """
+    value_type = type(value)
+    if value_type is str:
+        return b"s" + _length_prefixed(value.encode("utf-8", "surrogatepass"))
+    if value_type is bool:
+        return b"t" if value else b"f"
+    if value_type is int:
+        return b"i" + _length_prefixed(value.to_bytes(value.bit_length() // 8 + 1, "little", signed=True))
+    if value_type is float:
+        return b"d" + _FLOAT_STRUCT.pack(value)
+    if value is None:
+        return b"n"
+    return b"?" + _length_prefixed(repr(value).encode("utf-8", "surrogatepass"))
+
+def _scalars_equal(a: Any, b: Any) -> bool:
+    return type(a) is type(b) and a == b
+
+def _estimate_size(value: Any, budget: int) -> int:
+    """Approximate serialized size of value, giving up once it exceeds budget"""
+    size = 0
+    stack = [value]
+    while stack and size <= budget:
+        item = stack.pop()
+        if isinstance(item, dict):
+            size += 2 + len(item)
+            for key, child in item.items():
+                size += len(key) + 3
+                stack.append(child)
+        elif isinstance(item, list):
+            size += 2 + len(item)
+            stack.extend(item)
+        elif isinstance(item, str):
+            size += len(item) + 2
+        else:
+            size += len(repr(item))
+    return size
+
+class JsonDiff:
+    """
+    Structural diff producing an RFC 6902 JSON Patch
+
+    Every container in both documents gets a BLAKE2b digest bottom-up in one
+    pass, so identical subtrees are skipped without diffing them field by
+    field; a digest match is confirmed with == before skipping. Array elements
+    are matched by a shared identity key (e.g. "id") when every element has
+    one, otherwise by subtree digest, and reordering is expressed with "move"
+    operations computed in O(n log n).
+    """
+
+    def __init__(self, array_key: Optional[str] = None, max_operations: int = 10000,
+                 max_patch_bytes: Optional[int] = None):
+        self.array_key = array_key
+        self.max_operations = max_operations
+        self.max_patch_bytes = max_patch_bytes
+        self.operations: List[Dict[str, Any]] = []
+        self.patch_bytes = 0
+        self._hashes: Dict[int, bytes] = {}
+
+    def diff(self, source: Any, target: Any) -> Dict[str, Any]:
+        """Return the patch turning source into target and whether it was truncated"""
+        self._hash_tree(source)
+        self._hash_tree(target)
+
+        truncated = False
+        try:
+            self._diff(source, target, "")
+        except DiffLimitExceeded:
+            truncated = True
+        finally:
+            self._hashes.clear()
+
+        return {
+            "patch": self.operations,
+            "operation_count": len(self.operations),
+            "truncated": truncated
+        }
+
+    def _hash_tree(self, node: Any) -> bytes:
+        """
+        Return the identity of node: its scalar encoding, or for containers a
+        BLAKE2b digest of the children's identities tagged with b"c"
+        """
+        node_type = type(node)
+        if node_type is dict:
+            # Keys are unique, so sorting them makes the encoding independent of key order
+            parts = [b"o"]
+            for key in sorted(node):
+                value = node[key]
+                value_type = type(value)
+                parts.append(_length_prefixed(key.encode("utf-8", "surrogatepass")))
+                parts.append(self._hash_tree(value) if value_type is dict or value_type is list
+                             else _scalar_encoding(value))
+        elif node_type is list:
+            parts = [b"a"]
+            for item in node:
+                item_type = type(item)
+                parts.append(self._hash_tree(item) if item_type is dict or item_type is list
+                             else _scalar_encoding(item))
+        else:
+            return _scalar_encoding(node)
+        node_hash = b"c" + blake2b(b"".join(parts), digest_size=DIGEST_SIZE).digest()
+        self._hashes[id(node)] = node_hash
+        return node_hash
+
+    def _node_hash(self, node: Any) -> bytes:
+        if isinstance(node, (dict, list)):
+            return self._hashes[id(node)]
+        return _scalar_encoding(node)
+
+    def _emit(self, op: str, path: str, value: Any = _MISSING, from_path: Optional[str] = None) -> None:
+        if len(self.operations) >= self.max_operations:
+            raise DiffLimitExceeded()
+
+        operation = {"op": op, "path": path}
+        size = len(op) + len(path) + 24
+        if from_path is not None:
+            operation["from"] = from_path
+            size += len(from_path) + 10
+        if value is not _MISSING:
+            operation["value"] = value
+            if self.max_patch_bytes is not None:
+                size += _estimate_size(value, self.max_patch_bytes - self.patch_bytes)
+
+        if self.max_patch_bytes is not None and self.patch_bytes + size > self.max_patch_bytes:
+            raise DiffLimitExceeded()
+        self.patch_bytes += size
+        self.operations.append(operation)
+
+    def _diff(self, source: Any, target: Any, path: str) -> None:
+        source_is_container = isinstance(source, (dict, list))
+        target_is_container = isinstance(target, (dict, list))
+
+        if not source_is_container and not target_is_container:
+            if not _scalars_equal(source, target):
+                self._emit("replace", path, target)
+            return
+
+        # Equal digests mean equal types throughout; == then rules out a collision
+        if (source_is_container and target_is_container
+                and self._node_hash(source) == self._node_hash(target) and source == target):
+            return
+
+        if isinstance(source, dict) and isinstance(target, dict):
+            self._diff_objects(source, target, path)
+        elif isinstance(source, list) and isinstance(target, list):
+            self._diff_arrays(source, target, path)
+        else:
+            self._emit("replace", path, target)
+
+    def _diff_objects(self, source: Dict[str, Any], target: Dict[str, Any], path: str) -> None:
+        for key in source:
+            if key not in target:
+                self._emit("remove", f"{path}/{escape_pointer_token(key)}")
+        for key, value in target.items():
+            if key not in source:
+                self._emit("add", f"{path}/{escape_pointer_token(key)}", value)
+        for key, value in target.items():
+            if key in source:
+                self._diff(source[key], value, f"{path}/{escape_pointer_token(key)}")
+
+    def _match_key(self, source: List[Any], target: List[Any]) -> Optional[str]:
+        """Pick an object key that uniquely identifies elements in both arrays"""
+        if not source or not target:
+            return None
+        candidates = (self.array_key,) if self.array_key else DEFAULT_ARRAY_KEYS
+        for key in candidates:
+            if self._is_identity_key(source, key) and self._is_identity_key(target, key):
+                return key
+        return None
+
+    @staticmethod
+    def _is_identity_key(items: List[Any], key: str) -> bool:
+        seen = set()
+        for item in items:
+            if not isinstance(item, dict):
+                return False
+            value = item.get(key, _MISSING)
+            if value is _MISSING or not isinstance(value, (str, int)) or isinstance(value, bool):
+                return False
+            identity = (type(value), value)
+            if identity in seen:
+                return False
+            seen.add(identity)
+        return True
+
+    def _diff_arrays(self, source: List[Any], target: List[Any], path: str) -> None:
+        key = self._match_key(source, target)
+        if key is not None:
+            source_ids = [(type(item[key]), item[key]) for item in source]
+            target_ids = [(type(item[key]), item[key]) for item in target]
+        else:
+            source_ids = [self._node_hash(item) for item in source]
+            target_ids = [self._node_hash(item) for item in target]
+
+        # Match target elements to source elements with the same identity
+        available = defaultdict(deque)
+        for index, identity in enumerate(source_ids):
+            available[identity].append(index)
+        source_for_target: List[Optional[int]] = [None] * len(target)
+        source_matched = [False] * len(source)
+        for index, identity in enumerate(target_ids):
+            candidates = available.get(identity)
+            if candidates:
+                source_index = candidates.popleft()
+                source_for_target[index] = source_index
+                source_matched[source_index] = True
+
+        if key is None:
+            # Pair leftovers in order so an edited element becomes a nested diff
+            # rather than a remove plus an add
+            leftover_source = (i for i, matched in enumerate(source_matched) if not matched)
+            for index in range(len(target)):
+                if source_for_target[index] is None:
+                    source_index = next(leftover_source, None)
+                    if source_index is None:
+                        break
+                    source_for_target[index] = source_index
+                    source_matched[source_index] = True
+
+        for index in range(len(source) - 1, -1, -1):
+            if not source_matched[index]:
+                self._emit("remove", f"{path}/{index}")
+
+        # Rank surviving source elements by their order after the removals
+        rank = {}
+        for source_index in range(len(source)):
+            if source_matched[source_index]:
+                rank[source_index] = len(rank)
+        order = [rank[i] if i is not None else None for i in source_for_target]
+
+        placement = self._placement(order, len(rank), forward=True)
+        if any(step[0] == "move" for step in placement):
+            backward = self._placement(order, len(rank), forward=False)
+            if sum(1 for step in backward if step[0] == "move") < sum(1 for step in placement if step[0] == "move"):
+                placement = backward
+
+        for step in placement:
+            if step[0] == "add":
+                self._emit("add", f"{path}/{step[1]}", target[step[2]])
+            else:
+                self._emit("move", f"{path}/{step[2]}", from_path=f"{path}/{step[1]}")
+
+        for index, source_index in enumerate(source_for_target):
+            if source_index is not None:
+                self._diff(source[source_index], target[index], f"{path}/{index}")
+
+    @staticmethod
+    def _placement(order: Sequence[Optional[int]], survivors: int, forward: bool) -> List[Tuple]:
+        """
+        Compute add/move steps that turn the surviving elements into target order
+
+        Walking forward fixes a prefix of the target, walking backward fixes a
+        suffix. Each step uses the array index at the time it is applied, found
+        by counting the not-yet-placed elements in front of it.
+
+        Returns:
+            List of ("add", index, target_index) and ("move", from, to) steps
+        """
+        remaining = _Fenwick(survivors)
+        unplaced = survivors
+        steps = []
+
+        if forward:
+            for index, position in enumerate(order):
+                if position is None:
+                    steps.append(("add", index, index))
+                    continue
+                current = index + remaining.count_before(position)
+                remaining.remove(position)
+                if current != index:
+                    steps.append(("move", current, index))
+        else:
+            # The placed suffix sits behind all unplaced survivors
+            for index in range(len(order) - 1, -1, -1):
+                position = order[index]
+                if position is None:
+                    steps.append(("add", unplaced, index))
+                    continue
+                current = remaining.count_before(position)
+                remaining.remove(position)
+                unplaced -= 1
+                if current != unplaced:
+                    steps.append(("move", current, unplaced))
+        return steps
+
+def diff_json(source: Any, target: Any, array_key: Optional[str] = None,
+              max_operations: int = 10000, max_patch_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compute an RFC 6902 JSON Patch that turns source into target
+
+    Args:
+        source: Original JSON document
+        target: Modified JSON document
+        array_key: Object key identifying array elements (auto-detected if None)
+        max_operations: Maximum number of patch operations before truncating
+        max_patch_bytes: Approximate maximum serialized patch size before truncating
+
+    Returns:
+        Dictionary with the patch, operation count and a truncated flag. A
+        truncated patch is only a prefix of the full patch.
+    """
+    logger.debug("Diffing JSON",
+                source_type=type(source).__name__,
+                target_type=type(target).__name__,
+                array_key=array_key)
+
+    result = JsonDiff(array_key, max_operations, max_patch_bytes).diff(source, target)
+
+    logger.debug("JSON diff completed",
+                operations=result["operation_count"],
+                truncated=result["truncated"])
+    return result
@@ -0,0 +1,155 @@
+import math
+import cbor2
+import msgpack
+from typing import Any, Dict, Optional
+from app.logging_config import logger
+
+# Media types used for binary request and response bodies
+BINARY_MEDIA_TYPES = {
+    "msgpack": "application/msgpack",
+    "cbor": "application/cbor"
+}
+
+# Content-Type values accepted for each binary input encoding
+CONTENT_TYPE_ENCODINGS = {
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+    "application/cbor": "cbor"
+}
+
+# Media types for raw (unwrapped) text responses, with accepted aliases
+TEXT_MEDIA_TYPES = {
+    "json": ["application/json"],
+    "xml": ["application/xml", "text/xml"],
+    "csv": ["text/csv", "application/csv"],
+    "yaml": ["application/yaml", "application/x-yaml", "text/yaml", "text/x-yaml"]
+}
+
+def parse_accept(accept: Optional[str]) -> Dict[str, float]:
+    """Parse an Accept header into a mapping of media type to quality"""
+    preferences = {}
+    for part in (accept or "").split(","):
+        media_type, *params = part.split(";")
+        media_type = media_type.strip().lower()
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        preferences[media_type] = quality
+    return preferences
+
+def wants_raw_response(accept: Optional[str], output_format: str, raw: Optional[bool] = None) -> bool:
+    """
+    Decide whether to return converted output directly instead of the JSON envelope
+
+    An explicit raw flag always wins. Otherwise the Accept header must name the
+    output's media type (e.g. text/csv) with a higher quality than
+    application/json, so existing clients keep getting the envelope. JSON output
+    can only be requested raw with the flag, since the envelope is JSON too.
+
+    Args:
+        accept: Raw Accept header value
+        output_format: Output format name (json, xml, csv, yaml)
+        raw: Value of the raw query flag, if given
+    """
+    if raw is not None:
+        return raw
+    if output_format == "json" or output_format not in TEXT_MEDIA_TYPES:
+        return False
+
+    preferences = parse_accept(accept)
+    format_quality = max((preferences.get(media_type, 0.0) for media_type in TEXT_MEDIA_TYPES[output_format]), default=0.0)
+    json_quality = preferences.get("application/json", 0.0)
+    return format_quality > 0 and format_quality > json_quality
+
+def varies_on_accept(output_format: str, raw: Optional[bool] = None) -> bool:
+    """Whether wants_raw_response decides by the Accept header, so responses need Vary: Accept"""
+    return raw is None and output_format != "json" and output_format in TEXT_MEDIA_TYPES
+
+def get_body_encoding(content_type: Optional[str]) -> str:
+    """
+    Determine the request body encoding from a Content-Type header
+
+    Args:
+        content_type: Raw Content-Type header value (may include parameters)
+
+    Returns:
+        "msgpack" or "cbor" for binary media types, otherwise "json"
+    """
+    if not content_type:
+        return "json"
+    media_type = content_type.split(";")[0].strip().lower()
+    return CONTENT_TYPE_ENCODINGS.get(media_type, "json")
+
+def decode_binary_body(body: bytes, encoding: str) -> Any:
+    """
+    Decode a MessagePack or CBOR request body
+
+    Args:
+        body: Raw request body
+        encoding: "msgpack" or "cbor"
+
+    Returns:
+        Decoded data using only JSON-compatible types
+
+    Raises:
+        ValueError: If the body is malformed or holds values JSON cannot represent
+    """
+    logger.debug("Decoding binary body", encoding=encoding, data_size=len(body))
+
+    if not body:
+        raise ValueError(f"Empty {encoding} body")
+
+    if encoding not in BINARY_MEDIA_TYPES:
+        raise ValueError(f"Unsupported body encoding: {encoding}")
+
+    try:
+        if encoding == "msgpack":
+            data = msgpack.unpackb(body, raw=False)
+        else:
+            data = cbor2.loads(body)
+    except Exception as e:
+        raise ValueError(f"Invalid {encoding} data: {str(e)}")
+
+    ensure_json_compatible(data)
+    return data
+
+def ensure_json_compatible(data: Any, allow_scalar_keys: bool = False, allow_nan: bool = True) -> None:
+    """
+    Check that decoded data only uses types with a JSON equivalent
+
+    Binary formats can carry byte strings, non-string map keys, timestamps and
+    other tagged values. Rejecting them up front keeps the binary input path
+    behaving exactly like the JSON one.
+
+    Args:
+        data: Decoded data
+        allow_scalar_keys: Also accept number, boolean and null map keys, which
+            json.dumps writes as strings
+        allow_nan: Accept NaN and infinite floats
+
+    Raises:
+        ValueError: On the first value without a JSON representation
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if not isinstance(key, str) and not (allow_scalar_keys and (key is None or isinstance(key, (bool, int, float)))):
+                    raise ValueError(f"Map keys must be strings, got {type(key).__name__}")
+                stack.append(item)
+        elif isinstance(value, list):
+            stack.extend(value)
+        elif isinstance(value, float):
+            if not allow_nan and not math.isfinite(value):
+                raise ValueError(f"Unsupported number: {value} (NaN and infinity have no JSON representation)")
+        elif value is not None and not isinstance(value, (str, bool, int)):
+            raise ValueError(f"Unsupported value type: {type(value).__name__}")
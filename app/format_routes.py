@@ -1,27 +1,50 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
 from pydantic import ValidationError
 import json
 from app.models import JsonRequest 
-from app.format_utils import format_json
+from app.format_utils import format_json, iter_json_chunks
+from app.encoding_utils import get_body_encoding, decode_binary_body, wants_raw_response
 from app.error_utils import parse_json_error_details, format_json_error_message
 from app.logging_config import logger
 from app.logging_utils import log_request_payload, log_response_payload
+from app.profiling_utils import ProfiledIterator
 
 router = APIRouter()
 
 @router.post("/format")
-async def format_json_endpoint(request: Request):
+async def format_json_endpoint(
+    request: Request,
+    raw: Optional[bool] = Query(None, description="Return the formatted JSON as the response body instead of a JSON envelope")
+):
     """Format JSON with proper indentation"""
     try:
         # Get raw body to parse JSON manually for better error messages
         body = await request.body()
-        json_string = body.decode('utf-8')
+        encoding = get_body_encoding(request.headers.get("content-type"))
         
-        logger.info("Format request started", data_size=len(json_string))
+        logger.info("Format request started", data_size=len(body), encoding=encoding)
+        
+        if encoding != "json":
+            try:
+                parsed_json = decode_binary_body(body, encoding)
+            except ValueError as decode_error:
+                logger.error("Binary decoding error", encoding=encoding, error=str(decode_error))
+                raise HTTPException(
+                    status_code=422,
+                    detail={
+                        "error": f"Invalid {encoding} data",
+                        "message": str(decode_error),
+                        "type": "validation"
+                    }
+                )
         
         try:
             # Parse JSON to get detailed error if it fails
-            parsed_json = json.loads(json_string)
+            if encoding == "json":
+                json_string = body.decode('utf-8')
+                parsed_json = json.loads(json_string)
             log_request_payload(parsed_json, "format_request")
         except json.JSONDecodeError as json_error:
             # Extract detailed error information
@@ -45,6 +68,12 @@ async def format_json_endpoint(request: Request):
             )
         
         try:
+            if wants_raw_response(request.headers.get("accept"), "json", raw):
+                # Stream the formatted document directly, skipping the envelope's escaping
+                log_response_payload({"format": "json", "raw": True}, "format_response")
+                logger.info("Format request completed", success=True, raw=True)
+                return StreamingResponse(ProfiledIterator(iter_json_chunks(parsed_json)), media_type="application/json")
+            
             formatted_json = format_json(parsed_json)
             
             # Log response payload (sanitized and conditional)
@@ -1,5 +1,5 @@
 import json
-from typing import Any
+from typing import Any, Iterator
 from app.logging_config import logger
 
 def format_json(json_data: Any) -> str:
@@ -17,3 +17,17 @@ def format_json(json_data: Any) -> str:
     except (json.JSONDecodeError, TypeError) as e:
         logger.error("JSON formatting failed", error=str(e))
         return "Invalid JSON"
+
+def iter_json_chunks(json_data: Any, indent: int = 4, chunk_size: int = 65536) -> Iterator[str]:
+    """Serialize JSON like format_json, yielding chunks of roughly chunk_size characters"""
+    buffer = []
+    buffered = 0
+    for piece in json.JSONEncoder(indent=indent).iterencode(json_data):
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
@@ -1,11 +1,19 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import time
 import os
 from app.format_routes import router as format_router
 from app.convert_routes import router as convert_router
 from app.query_routes import router as query_router
+from app.validate_routes import router as validate_router
+from app.diff_routes import router as diff_router
+from app.tree_routes import router as tree_router
 from app.logging_config import logger
+from app.profiling_utils import (
+    get_profile_mode, start_request_profile, finish_request_profile,
+    build_profile_report, save_profile
+)
 
 app = FastAPI(title="JSON Toolkit", description="Professional JSON editing, formatting, and conversion tools")
 
@@ -19,7 +27,16 @@ async def log_requests(request: Request, call_next):
                 url=str(request.url),
                 client_ip=request.client.host)
     
-    response = await call_next(request)
+    profile_mode = get_profile_mode(
+        request.headers.get(os.getenv('PROFILE_HEADER', 'X-Profile')),
+        request.headers.get(os.getenv('PROFILE_TOKEN_HEADER', 'X-Profile-Token'))
+    )
+    profiler = start_request_profile(profile_mode["allocations"]) if profile_mode else None
+    
+    if profiler is None:
+        response = await call_next(request)
+    else:
+        response = await profile_request(request, call_next, profiler, profile_mode["inline"])
     
     process_time = time.time() - start_time
     logger.info("Request completed",
@@ -30,6 +47,31 @@ async def log_requests(request: Request, call_next):
     
     return response
 
+async def profile_request(request: Request, call_next, profiler, inline: bool) -> Response:
+    """Run the request under the profiler and attach or save the resulting profile"""
+    try:
+        response = await call_next(request)
+        # Drain the body so streamed conversion work is included in the profile
+        body = b"".join([chunk async for chunk in response.body_iterator])
+    finally:
+        finish_request_profile(profiler)
+    
+    content_length = request.headers.get("content-length")
+    tags = {
+        "route": request.url.path,
+        "format": request.query_params.get("format"),
+        "payload_size": int(content_length) if content_length and content_length.isdigit() else None,
+        "status_code": response.status_code
+    }
+    
+    if inline:
+        return JSONResponse({"profile": build_profile_report(profiler, tags)}, status_code=response.status_code)
+    
+    profile_id = save_profile(profiler, tags)
+    profiled_response = Response(content=body, status_code=response.status_code, headers=dict(response.headers))
+    profiled_response.headers["X-Profile-Id"] = profile_id
+    return profiled_response
+
 # Get allowed origins from environment or use defaults
 def get_allowed_origins():
     """Get CORS allowed origins from environment variable or use defaults"""
@@ -68,6 +110,9 @@ app.add_middleware(
 app.include_router(format_router)
 app.include_router(convert_router)
 app.include_router(query_router)
+app.include_router(validate_router)
+app.include_router(diff_router)
+app.include_router(tree_router)
 
 @app.get("/")
 def read_root():
@@ -1,4 +1,4 @@
-from typing import Dict, Any, Union, List
+from typing import Dict, Any, Union, List, Optional, Literal
 from pydantic import RootModel, ValidationError, BaseModel, Field
 import json
 
@@ -53,3 +53,74 @@ class JsonPathRequest(BaseModel):
             except json.JSONDecodeError as e:
                 raise ValueError(f"Invalid JSON syntax: {e.msg} at position {e.pos}")
         return v
+
+class SchemaValidationRequest(BaseModel):
+    """Request model for JSON Schema validation"""
+    document: Optional[Any] = Field(
+        None,
+        description="Single JSON document to validate"
+    )
+    documents: Optional[List[Any]] = Field(
+        None,
+        description="Batch of JSON documents validated against the same schema"
+    )
+    json_schema: Optional[Union[Dict[str, Any], bool]] = Field(
+        None,
+        alias="schema",
+        description="Inline JSON Schema"
+    )
+    schema_id: Optional[str] = Field(
+        None,
+        description="Id of a registered schema (file name in SCHEMA_DIR without .json)",
+        min_length=1
+    )
+    mode: Literal["fail_fast", "collect_all"] = Field(
+        "collect_all",
+        description="Stop at the first error or collect all errors"
+    )
+    max_errors: int = Field(
+        100,
+        description="Maximum number of errors reported per document",
+        ge=1,
+        le=10000
+    )
+    
+    model_config = {
+        "populate_by_name": True,
+        "json_schema_extra": {
+            "description": "Document(s) and an inline or registered schema to validate against"
+        }
+    }
+
+class DiffRequest(BaseModel):
+    """Request model for structural JSON diff"""
+    source: Any = Field(
+        ...,
+        description="Original JSON document"
+    )
+    target: Any = Field(
+        ...,
+        description="Modified JSON document"
+    )
+    array_key: Optional[str] = Field(
+        None,
+        description="Object key identifying array elements (auto-detected from id, _id, uuid, key, name if omitted)",
+        min_length=1
+    )
+    max_operations: int = Field(
+        10000,
+        description="Maximum number of patch operations returned",
+        ge=1,
+        le=1000000
+    )
+    max_patch_bytes: int = Field(
+        10_000_000,
+        description="Approximate maximum size of the returned patch in bytes",
+        ge=1
+    )
+    
+    model_config = {
+        "json_schema_extra": {
+            "description": "Two JSON documents to compare"
+        }
+    }
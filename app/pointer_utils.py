@@ -0,0 +1,59 @@
+import re
+from typing import Any, Iterable, List
+
+# Array index reference token (RFC 6901): ASCII digits without leading zeros
+ARRAY_INDEX_PATTERN = re.compile(r'0|[1-9][0-9]*')
+
+class JsonPointerError(LookupError):
+    """Raised when a JSON Pointer is malformed or does not resolve"""
+
+def escape_pointer_token(token: Any) -> str:
+    """Escape a single reference token for use in a JSON Pointer (RFC 6901)"""
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+def to_json_pointer(path: Iterable[Any]) -> str:
+    """
+    Build a JSON Pointer from a sequence of object keys and array indexes
+    
+    Args:
+        path: Keys and indexes from the document root, e.g. ['users', 0, 'name']
+    
+    Returns:
+        JSON Pointer string, e.g. '/users/0/name' ('' for the root)
+    """
+    return "".join("/" + escape_pointer_token(token) for token in path)
+
+def parse_json_pointer(pointer: str) -> List[str]:
+    """
+    Split a JSON Pointer into unescaped reference tokens
+    
+    Raises:
+        JsonPointerError: If the pointer is not empty and does not start with '/'
+    """
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPointerError(f"Invalid JSON Pointer '{pointer}': must be empty or start with '/'")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+def resolve_json_pointer(document: Any, pointer: str) -> Any:
+    """
+    Return the value a JSON Pointer refers to inside document
+    
+    Raises:
+        JsonPointerError: If the pointer is malformed or a token does not exist
+    """
+    tokens = parse_json_pointer(pointer)
+    node = document
+    for depth, token in enumerate(tokens):
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPointerError(f"Key '{token}' not found at '{to_json_pointer(tokens[:depth])}'")
+            node = node[token]
+        elif isinstance(node, list):
+            if not ARRAY_INDEX_PATTERN.fullmatch(token) or int(token) >= len(node):
+                raise JsonPointerError(f"Index '{token}' not found at '{to_json_pointer(tokens[:depth])}'")
+            node = node[int(token)]
+        else:
+            raise JsonPointerError(f"Cannot descend into a scalar at '{to_json_pointer(tokens[:depth])}'")
+    return node
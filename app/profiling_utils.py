@@ -0,0 +1,253 @@
+import cProfile
+import functools
+import hmac
+import io
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+from app.logging_config import logger
+
+# cProfile and tracemalloc are process-wide tools, so only one request is profiled at a time
+_profile_lock = threading.Lock()
+
+# From Python 3.12 cProfile is built on sys.monitoring and sees every thread; before
+# that it only traces the thread that enabled it
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+# Profiler of the request being handled, inherited by threadpool work done for it
+_active_profiler: ContextVar[Optional["RequestProfiler"]] = ContextVar("active_profiler", default=None)
+
+def profiling_enabled() -> bool:
+    """Profiling is opt-in and disabled unless PROFILING_ENABLED is true"""
+    return os.getenv('PROFILING_ENABLED', 'false').lower() == 'true'
+
+def get_profile_mode(header_value: Optional[str], token: Optional[str] = None) -> Optional[Dict[str, bool]]:
+    """
+    Decide whether and how to profile a request
+
+    Profiles return server source paths and can switch on tracemalloc, so the
+    header is only honoured with a token matching PROFILE_TOKEN. Without
+    PROFILE_TOKEN, only sampled requests are profiled.
+
+    Args:
+        header_value: Value of the PROFILE_HEADER request header, if present.
+            Any non-empty value requests a profile; the comma-separated tokens
+            'inline' and 'alloc' return the profile in the response and add
+            an allocation snapshot respectively.
+        token: Value of the PROFILE_TOKEN_HEADER request header, if present
+
+    Returns:
+        Dictionary with 'inline' and 'allocations' flags, or None to skip profiling
+    """
+    if not profiling_enabled():
+        return None
+
+    allocations = os.getenv('PROFILE_ALLOCATIONS', 'false').lower() == 'true'
+    if header_value:
+        if profile_token_valid(token):
+            tokens = {part.strip().lower() for part in header_value.split(',')}
+            return {"inline": "inline" in tokens, "allocations": allocations or "alloc" in tokens}
+        logger.warning("Profile header ignored without a valid profile token")
+
+    sample_rate = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    if sample_rate > 0 and random.random() < sample_rate:
+        return {"inline": False, "allocations": allocations}
+    return None
+
+def profile_token_valid(token: Optional[str]) -> bool:
+    """Whether token matches PROFILE_TOKEN; always False when no token is configured"""
+    expected = os.getenv('PROFILE_TOKEN', '')
+    if not expected or not token:
+        return False
+    return hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8'))
+
+class RequestProfiler:
+    """
+    cProfile call statistics, plus an optional tracemalloc snapshot, for one request
+
+    Sync endpoints and sync streaming iterators run in the threadpool. Where
+    cProfile only traces its own thread, run_in_thread gives each worker
+    thread its own profile, and the statistics merge all of them.
+    """
+
+    def __init__(self, allocations: bool = False):
+        self.allocations = allocations
+        self.profile = cProfile.Profile()
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.duration = 0.0
+        self._started_tracemalloc = False
+        self._start_time = 0.0
+        self._thread_id: Optional[int] = None
+        self._thread_profiles: Dict[int, cProfile.Profile] = {}
+        self._thread_lock = threading.Lock()
+        self._running = False
+        self.context_token: Optional[Token] = None
+
+    def start(self) -> None:
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(int(os.getenv('PROFILE_TRACEMALLOC_FRAMES', '1')))
+            self._started_tracemalloc = True
+        self._thread_id = threading.get_ident()
+        self._running = True
+        self._start_time = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+        self._running = False
+        self.duration = time.perf_counter() - self._start_time
+        if self.allocations and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+    def run_in_thread(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Call func, recording it under a profile for the current worker thread"""
+        thread_id = threading.get_ident()
+        if PROFILES_ALL_THREADS or not self._running or thread_id == self._thread_id:
+            return func(*args, **kwargs)
+
+        with self._thread_lock:
+            profile = self._thread_profiles.setdefault(thread_id, cProfile.Profile())
+        # A worker thread runs one call at a time, so its profile is never enabled twice
+        profile.enable()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+
+    def stats(self) -> pstats.Stats:
+        """Call statistics of the request thread merged with its worker threads"""
+        stats = pstats.Stats(self.profile)
+        with self._thread_lock:
+            thread_profiles = list(self._thread_profiles.values())
+        for profile in thread_profiles:
+            stats.add(profile)
+        return stats
+
+    def stats_text(self, limit: int = 40) -> str:
+        """Call statistics sorted by cumulative time"""
+        output = io.StringIO()
+        stats = self.stats()
+        stats.stream = output
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return output.getvalue()
+
+    def top_allocations(self, limit: int = 25) -> List[Dict[str, Any]]:
+        """Largest allocation sites still alive when the request finished"""
+        if self.snapshot is None:
+            return []
+        return [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in self.snapshot.statistics('lineno')[:limit]
+        ]
+
+def profile_in_threadpool(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorate a sync endpoint so its threadpool run is included in the request profile"""
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profiler = _active_profiler.get()
+        if profiler is None:
+            return func(*args, **kwargs)
+        return profiler.run_in_thread(func, *args, **kwargs)
+    return wrapper
+
+class ProfiledIterator:
+    """
+    Sync iterator whose steps are included in the request profile
+
+    StreamingResponse advances sync iterators in the threadpool, one step per
+    chunk, so each step is recorded on the worker thread that runs it.
+    """
+
+    def __init__(self, iterable: Iterable[Any]):
+        self._iterator = iter(iterable)
+
+    def __iter__(self) -> Iterator[Any]:
+        return self
+
+    def __next__(self) -> Any:
+        profiler = _active_profiler.get()
+        if profiler is None:
+            return next(self._iterator)
+        return profiler.run_in_thread(next, self._iterator)
+
+def start_request_profile(allocations: bool = False) -> Optional[RequestProfiler]:
+    """Start profiling, or return None if another request is already being profiled"""
+    if not _profile_lock.acquire(blocking=False):
+        logger.warning("Profiling skipped, another request is being profiled")
+        return None
+    profiler = RequestProfiler(allocations)
+    try:
+        profiler.start()
+    except Exception:
+        _profile_lock.release()
+        raise
+    profiler.context_token = _active_profiler.set(profiler)
+    return profiler
+
+def finish_request_profile(profiler: RequestProfiler) -> None:
+    """Stop profiling and let the next request be profiled"""
+    try:
+        profiler.stop()
+    finally:
+        _active_profiler.reset(profiler.context_token)
+        _profile_lock.release()
+
+def build_profile_report(profiler: RequestProfiler, tags: Dict[str, Any]) -> Dict[str, Any]:
+    """Profile summary tagged with route, format and payload size"""
+    return {
+        **tags,
+        "duration_ms": round(profiler.duration * 1000, 2),
+        "stats": profiler.stats_text(),
+        "allocations": profiler.top_allocations()
+    }
+
+def save_profile(profiler: RequestProfiler, tags: Dict[str, Any]) -> str:
+    """
+    Write a profile to PROFILE_DIR and prune the oldest beyond PROFILE_MAX_FILES
+
+    Each profile is a .prof file (loadable with pstats or snakeviz) plus a
+    .json file with the tags, a text summary and any allocation statistics.
+
+    Returns:
+        Profile id shared by both file names
+    """
+    profile_dir = os.getenv('PROFILE_DIR', 'profiles')
+    os.makedirs(profile_dir, exist_ok=True)
+
+    route = re.sub(r'[^A-Za-z0-9]+', '_', tags["route"]).strip('_') or "root"
+    profile_id = (
+        f"{time.strftime('%Y%m%dT%H%M%S')}-{route}-{tags['format'] or 'none'}-"
+        f"{tags['payload_size'] if tags['payload_size'] is not None else 'unknown'}b-{uuid.uuid4().hex[:8]}"
+    )
+
+    profiler.stats().dump_stats(os.path.join(profile_dir, f"{profile_id}.prof"))
+    with open(os.path.join(profile_dir, f"{profile_id}.json"), "w", encoding="utf-8") as report_file:
+        json.dump(build_profile_report(profiler, tags), report_file, indent=2)
+
+    prune_profiles(profile_dir, int(os.getenv('PROFILE_MAX_FILES', '50')))
+    logger.info("Request profile saved", profile_id=profile_id, profile_dir=profile_dir, **tags)
+    return profile_id
+
+def prune_profiles(profile_dir: str, max_profiles: int) -> None:
+    """Delete the oldest profiles so at most max_profiles remain"""
+    profiles = sorted(
+        (entry for entry in os.scandir(profile_dir) if entry.name.endswith('.prof')),
+        key=lambda entry: entry.stat().st_mtime
+    )
+    for entry in profiles[:max(0, len(profiles) - max_profiles)]:
+        for path in (entry.path, entry.path[:-len('.prof')] + '.json'):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -1,18 +1,102 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import ValidationError
 from jsonpath_ng.exceptions import JSONPathError
 from app.models import JsonPathRequest
 from app.query_utils import query_json_path
+from app.encoding_utils import get_body_encoding, decode_binary_body
 from app.error_utils import parse_json_error_details, format_json_error_message
 from app.logging_config import logger
 from app.logging_utils import log_request_payload, log_response_payload
+from app.profiling_utils import profile_in_threadpool
 import json
 
 router = APIRouter()
 
-@router.post("/query")
-def query_json_path_endpoint(request: JsonPathRequest):
+async def parse_query_request(request: Request) -> JsonPathRequest:
+    """Read a query request body encoded as JSON, MessagePack or CBOR"""
+    body = await request.body()
+    encoding = get_body_encoding(request.headers.get("content-type"))
+    
+    if encoding == "json":
+        try:
+            json_string = body.decode('utf-8')
+        except UnicodeDecodeError as decode_error:
+            logger.error("Invalid UTF-8 in query body", position=decode_error.start)
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "Invalid encoding",
+                    "message": f"Request body is not valid UTF-8 (byte {decode_error.start})",
+                    "type": "validation"
+                }
+            )
+        try:
+            data = json.loads(json_string)
+        except json.JSONDecodeError as json_error:
+            error_details = parse_json_error_details(json_error, json_string)
+            logger.error("JSON parsing error in query",
+                        line=error_details["line"],
+                        column=error_details["column"],
+                        message=error_details["message"])
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "error": "Invalid JSON",
+                    "message": error_details["message"],
+                    "line": error_details["line"],
+                    "column": error_details["column"],
+                    "position": error_details["position"],
+                    "snippet": error_details["snippet"],
+                    "formatted_message": format_json_error_message(error_details),
+                    "type": "validation"
+                }
+            )
+    else:
+        try:
+            data = decode_binary_body(body, encoding)
+        except ValueError as decode_error:
+            logger.error("Binary decoding error in query", encoding=encoding, error=str(decode_error))
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "error": f"Invalid {encoding} data",
+                    "message": str(decode_error),
+                    "type": "validation"
+                }
+            )
+    
+    try:
+        return JsonPathRequest.model_validate(data)
+    except ValidationError as e:
+        logger.error("Validation error", error=str(e))
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Invalid input",
+                "message": str(e),
+                "type": "validation"
+            }
+        )
+
+@router.post(
+    "/query",
+    openapi_extra={
+        "requestBody": {
+            "content": {"application/json": {"schema": JsonPathRequest.model_json_schema()}},
+            "required": True
+        }
+    }
+)
+async def query_json_path_endpoint(http_request: Request):
     """Query JSON data using JSONPath expression"""
+    request = await parse_query_request(http_request)
+    # Evaluating and formatting large results is CPU-bound, so keep it off the event loop
+    return await run_in_threadpool(run_query, request)
+
+@profile_in_threadpool
+def run_query(request: JsonPathRequest):
+    """Run a parsed query request and build its response"""
     logger.info("Query request started", 
                 path=request.path, 
                 data_size=len(str(request.root)))
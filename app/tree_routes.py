@@ -0,0 +1,159 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+import json
+from app.tree_utils import compute_document_id, get_stored_document, shallow_view, store_document
+from app.pointer_utils import JsonPointerError
+from app.encoding_utils import get_body_encoding, decode_binary_body
+from app.error_utils import parse_json_error_details, format_json_error_message
+from app.logging_config import logger
+from app.profiling_utils import profile_in_threadpool
+
+router = APIRouter()
+
+def view_or_error(document, pointer: str, offset: int, limit: int, preview_length: int, document_id: Optional[str] = None):
+    """Build a shallow view, turning pointer errors into 404 responses"""
+    try:
+        return shallow_view(document, pointer, offset, limit, preview_length, document_id)
+    except JsonPointerError as e:
+        logger.error("Tree pointer not found", pointer=pointer, error=str(e))
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Pointer not found",
+                "message": str(e),
+                "pointer": pointer,
+                "type": "validation"
+            }
+        )
+
+@router.post("/tree")
+async def upload_tree_document_endpoint(
+    request: Request,
+    pointer: str = Query("", description="JSON Pointer of the node to return"),
+    offset: int = Query(0, ge=0, description="Index of the first child to return"),
+    limit: int = Query(100, ge=1, le=10000, description="Maximum number of children to return"),
+    preview_length: int = Query(200, ge=1, description="Maximum characters shown for string values")
+):
+    """Store a document for lazy browsing and return its summary and a shallow view"""
+    body = await request.body()
+    encoding = get_body_encoding(request.headers.get("content-type"))
+    # Hashing, parsing and summarizing a huge document would stall the event loop
+    return await run_in_threadpool(upload_tree_document, body, encoding, pointer, offset, limit, preview_length)
+
+@profile_in_threadpool
+def upload_tree_document(body: bytes, encoding: str, pointer: str, offset: int, limit: int, preview_length: int):
+    """Parse, summarize and store an uploaded document and build the upload response"""
+    document_id = compute_document_id(body)
+
+    logger.info("Tree upload started", data_size=len(body), encoding=encoding, document_id=document_id)
+
+    stored = get_stored_document(document_id)
+    if stored is not None:
+        # Same bytes were uploaded before, skip parsing entirely
+        document, summary = stored
+        in_store = True
+    else:
+        if encoding != "json":
+            try:
+                document = decode_binary_body(body, encoding)
+            except ValueError as decode_error:
+                logger.error("Binary decoding error in tree upload", encoding=encoding, error=str(decode_error))
+                raise HTTPException(
+                    status_code=422,
+                    detail={
+                        "error": f"Invalid {encoding} data",
+                        "message": str(decode_error),
+                        "type": "validation"
+                    }
+                )
+        else:
+            try:
+                json_string = body.decode('utf-8')
+            except UnicodeDecodeError as decode_error:
+                logger.error("Invalid UTF-8 in tree upload", position=decode_error.start)
+                raise HTTPException(
+                    status_code=400,
+                    detail={
+                        "error": "Invalid encoding",
+                        "message": f"Request body is not valid UTF-8 (byte {decode_error.start})",
+                        "type": "validation"
+                    }
+                )
+            try:
+                document = json.loads(json_string)
+            except json.JSONDecodeError as json_error:
+                error_details = parse_json_error_details(json_error, json_string)
+                logger.error("JSON parsing error in tree upload",
+                            line=error_details["line"],
+                            column=error_details["column"],
+                            message=error_details["message"])
+                raise HTTPException(
+                    status_code=422,
+                    detail={
+                        "error": "Invalid JSON",
+                        "message": error_details["message"],
+                        "line": error_details["line"],
+                        "column": error_details["column"],
+                        "position": error_details["position"],
+                        "snippet": error_details["snippet"],
+                        "formatted_message": format_json_error_message(error_details),
+                        "type": "validation"
+                    }
+                )
+        summary, in_store = store_document(document_id, document)
+
+    response_data = {
+        "document_id": document_id if in_store else None,
+        "stored": in_store,
+        "summary": summary,
+        "node": view_or_error(document, pointer, offset, limit, preview_length, document_id if in_store else None)
+    }
+
+    logger.info("Tree upload completed", document_id=document_id, stored=in_store, success=True)
+    return response_data
+
+@router.get("/tree/{document_id}")
+@profile_in_threadpool
+def get_tree_node_endpoint(
+    document_id: str,
+    pointer: str = Query("", description="JSON Pointer of the node to return"),
+    offset: int = Query(0, ge=0, description="Index of the first child to return"),
+    limit: int = Query(100, ge=1, le=10000, description="Maximum number of children to return"),
+    preview_length: int = Query(200, ge=1, description="Maximum characters shown for string values")
+):
+    """Return the node at a JSON Pointer with a page of its children"""
+    stored = get_stored_document(document_id)
+    if stored is None:
+        logger.error("Tree document not found", document_id=document_id)
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Document not found",
+                "message": "Document not found or evicted; upload it again with POST /tree",
+                "type": "validation"
+            }
+        )
+
+    view = view_or_error(stored[0], pointer, offset, limit, preview_length, document_id)
+    logger.info("Tree node served", document_id=document_id, pointer=pointer, children=len(view.get("children", [])))
+    return view
+
+@router.get("/tree/{document_id}/summary")
+@profile_in_threadpool
+def get_tree_summary_endpoint(document_id: str):
+    """Return the structural summary of a stored document"""
+    stored = get_stored_document(document_id)
+    if stored is None:
+        logger.error("Tree document not found", document_id=document_id)
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Document not found",
+                "message": "Document not found or evicted; upload it again with POST /tree",
+                "type": "validation"
+            }
+        )
+
+    logger.info("Tree summary served", document_id=document_id)
+    return stored[1]
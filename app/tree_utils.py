@@ -0,0 +1,201 @@
+import hashlib
+import heapq
+import itertools
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+from app.cache_utils import LRUCache
+from app.logging_config import logger
+from app.pointer_utils import escape_pointer_token, resolve_json_pointer
+
+# Uploaded documents keyed by document id: (document, summary), weighted by
+# their estimated in-memory size rather than the size of the upload
+document_store = LRUCache(
+    int(os.getenv('TREE_CACHE_DOCUMENTS', '32')),
+    max_weight=int(os.getenv('TREE_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+)
+
+# Child type counts of browsed containers keyed by (document id, pointer), so
+# paging through a large array does not count its children again for every page
+child_types_cache = LRUCache(int(os.getenv('TREE_CHILD_TYPES_CACHE', '4096')))
+
+def json_type(value: Any) -> str:
+    """JSON type name of a value: object, array, string, integer, number, boolean or null"""
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    return "null"
+
+def compute_document_id(body: bytes) -> str:
+    """Identify a document by the hash of its uploaded bytes"""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+def summarize_document(document: Any, top_arrays: int = 10) -> Dict[str, Any]:
+    """
+    Describe a document's structure in a single pass
+
+    Returns:
+        Dictionary with maximum depth, total node count, a histogram of JSON
+        types, the largest arrays with their JSON Pointers and the estimated
+        memory held by the parsed document
+    """
+    type_histogram: Dict[str, int] = {}
+    node_count = 0
+    # Object keys are mostly shared between objects by the JSON parser, so only
+    # containers and values are counted
+    memory_bytes = 0
+    getsizeof = sys.getsizeof
+    max_depth = 0
+    largest: List[Tuple[int, int, str]] = []
+    counter = itertools.count()
+
+    # Iterative walk so deeply nested documents cannot overflow the stack
+    stack: List[Tuple[Any, int, str]] = [(document, 0, "")]
+    while stack:
+        node, depth, pointer = stack.pop()
+        node_count += 1
+        memory_bytes += getsizeof(node)
+        node_type = json_type(node)
+        type_histogram[node_type] = type_histogram.get(node_type, 0) + 1
+        if depth > max_depth:
+            max_depth = depth
+
+        if node_type == "object":
+            for key, value in node.items():
+                if isinstance(value, (dict, list)):
+                    stack.append((value, depth + 1, f"{pointer}/{escape_pointer_token(key)}"))
+                else:
+                    node_count += 1
+                    memory_bytes += getsizeof(value)
+                    value_type = json_type(value)
+                    type_histogram[value_type] = type_histogram.get(value_type, 0) + 1
+                    max_depth = max(max_depth, depth + 1)
+        elif node_type == "array":
+            entry = (len(node), -next(counter), pointer)
+            if len(largest) < top_arrays:
+                heapq.heappush(largest, entry)
+            elif entry > largest[0]:
+                heapq.heapreplace(largest, entry)
+            for index, value in enumerate(node):
+                if isinstance(value, (dict, list)):
+                    stack.append((value, depth + 1, f"{pointer}/{index}"))
+                else:
+                    node_count += 1
+                    memory_bytes += getsizeof(value)
+                    value_type = json_type(value)
+                    type_histogram[value_type] = type_histogram.get(value_type, 0) + 1
+                    max_depth = max(max_depth, depth + 1)
+
+    return {
+        "max_depth": max_depth,
+        "node_count": node_count,
+        "type_histogram": type_histogram,
+        "largest_arrays": [
+            {"pointer": pointer, "length": length}
+            for length, _, pointer in sorted(largest, reverse=True)
+        ],
+        "estimated_memory_bytes": memory_bytes
+    }
+
+def describe_value(value: Any, preview_length: int = 200) -> Dict[str, Any]:
+    """
+    Summarize a value without its descendants
+
+    Containers report their child count; scalars include their value, with
+    long strings cut to preview_length characters.
+    """
+    value_type = json_type(value)
+    if value_type in ("object", "array"):
+        return {"type": value_type, "child_count": len(value)}
+    if value_type == "string" and len(value) > preview_length:
+        return {"type": value_type, "value": value[:preview_length], "truncated": True, "length": len(value)}
+    return {"type": value_type, "value": value}
+
+def count_child_types(node: Any) -> Dict[str, int]:
+    """Histogram of the JSON types of a container's children"""
+    child_types: Dict[str, int] = {}
+    for child in (node.values() if isinstance(node, dict) else node):
+        child_type = json_type(child)
+        child_types[child_type] = child_types.get(child_type, 0) + 1
+    return child_types
+
+def shallow_view(document: Any, pointer: str = "", offset: int = 0, limit: int = 100,
+                 preview_length: int = 200, document_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Return the node at pointer with one page of its children
+
+    Args:
+        document: Parsed JSON document
+        pointer: JSON Pointer of the node to show ('' for the root)
+        offset: Index of the first child to include
+        limit: Maximum number of children to include
+        preview_length: Maximum characters shown for string values
+        document_id: Id of the stored document, to reuse the child type
+            counts across pages; None counts them every time
+
+    Raises:
+        JsonPointerError: If the pointer is malformed or does not resolve
+    """
+    node = resolve_json_pointer(document, pointer)
+    view = {"pointer": pointer, **describe_value(node, preview_length)}
+    if not isinstance(node, (dict, list)):
+        return view
+
+    # Counting is O(children), while a page is O(limit)
+    cache_key = (document_id, pointer) if document_id is not None else None
+    child_types = child_types_cache.get(cache_key) if cache_key is not None else None
+    if child_types is None:
+        child_types = count_child_types(node)
+        if cache_key is not None:
+            child_types_cache.put(cache_key, child_types)
+
+    if isinstance(node, dict):
+        page = itertools.islice(node.items(), offset, offset + limit)
+    else:
+        page = ((index, node[index]) for index in range(offset, min(offset + limit, len(node))))
+
+    view["child_types"] = dict(child_types)
+    view["children"] = [
+        {"key": key, "pointer": f"{pointer}/{escape_pointer_token(key)}", **describe_value(value, preview_length)}
+        for key, value in page
+    ]
+    view["offset"] = offset
+    view["limit"] = limit
+    view["has_more"] = offset + limit < len(node)
+    return view
+
+def store_document(document_id: str, document: Any) -> Tuple[Dict[str, Any], bool]:
+    """
+    Summarize a document and keep it for later subtree requests
+
+    The store's byte limit is charged with the summary's estimated memory
+    size, since a parsed document takes several times the bytes of its JSON.
+
+    Returns:
+        Tuple of (summary, whether the document fit in the store)
+    """
+    cached = document_store.get(document_id)
+    if cached is not None:
+        return cached[1], True
+
+    summary = summarize_document(document)
+    stored = document_store.put(document_id, (document, summary), weight=summary["estimated_memory_bytes"])
+    logger.debug("Tree document stored",
+                document_id=document_id,
+                stored=stored,
+                node_count=summary["node_count"],
+                cache=document_store.stats())
+    return summary, stored
+
+def get_stored_document(document_id: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    """Return (document, summary) for a stored document, or None if it was evicted"""
+    return document_store.get(document_id)
@@ -0,0 +1,154 @@
+from fastapi import APIRouter, HTTPException
+from jsonschema.exceptions import SchemaError
+from referencing.exceptions import Unresolvable
+from app.models import SchemaValidationRequest
+from app.validate_utils import (
+    SchemaNotFoundError,
+    compute_schema_hash,
+    get_validator,
+    list_registered_schemas,
+    load_registered_schema,
+    validate_document,
+    validator_cache
+)
+from app.logging_config import logger
+from app.logging_utils import log_request_payload, log_response_payload
+from app.profiling_utils import profile_in_threadpool
+
+router = APIRouter()
+
+@router.post("/validate")
+@profile_in_threadpool
+def validate_endpoint(request: SchemaValidationRequest):
+    """Validate one or more JSON documents against a JSON Schema"""
+    fields_set = request.model_fields_set
+    has_document = "document" in fields_set
+    has_documents = "documents" in fields_set and request.documents is not None
+    has_schema = "json_schema" in fields_set and request.json_schema is not None
+    has_schema_id = request.schema_id is not None
+
+    if has_document == has_documents:
+        logger.error("Invalid validate request", reason="document_and_documents")
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Invalid input",
+                "message": "Provide exactly one of 'document' or 'documents'",
+                "type": "validation"
+            }
+        )
+    if has_schema == has_schema_id:
+        logger.error("Invalid validate request", reason="schema_and_schema_id")
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Invalid input",
+                "message": "Provide exactly one of 'schema' or 'schema_id'",
+                "type": "validation"
+            }
+        )
+
+    logger.info("Validate request started",
+                schema_id=request.schema_id,
+                mode=request.mode,
+                documents=len(request.documents) if has_documents else 1)
+
+    log_request_payload(request.model_dump(by_alias=True, exclude_unset=True), "validate_request")
+
+    try:
+        if has_schema_id:
+            schema, schema_hash = load_registered_schema(request.schema_id)
+        else:
+            schema = request.json_schema
+            schema_hash = compute_schema_hash(schema)
+        validator = get_validator(schema, schema_hash)
+    except SchemaNotFoundError as e:
+        logger.error("Schema not found", schema_id=request.schema_id)
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "error": "Schema not found",
+                "message": str(e),
+                "type": "validation"
+            }
+        )
+    except SchemaError as e:
+        logger.error("Invalid schema", schema_id=request.schema_id, error=e.message)
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Invalid schema",
+                "message": e.message,
+                "type": "validation"
+            }
+        )
+    except ValueError as e:
+        logger.error("Schema loading failed", schema_id=request.schema_id, error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Processing error",
+                "message": str(e),
+                "type": "server"
+            }
+        )
+
+    fail_fast = request.mode == "fail_fast"
+
+    try:
+        if has_documents:
+            results = []
+            for index, document in enumerate(request.documents):
+                result = validate_document(validator, document, fail_fast, request.max_errors)
+                result["index"] = index
+                results.append(result)
+            valid_count = sum(1 for result in results if result["valid"])
+            response_data = {
+                "valid": valid_count == len(results),
+                "results": results,
+                "document_count": len(results),
+                "valid_count": valid_count,
+                "invalid_count": len(results) - valid_count,
+                "mode": request.mode,
+                "schema_hash": schema_hash
+            }
+        else:
+            response_data = validate_document(validator, request.document, fail_fast, request.max_errors)
+            response_data["mode"] = request.mode
+            response_data["schema_hash"] = schema_hash
+    except Unresolvable as e:
+        logger.error("Unresolvable schema reference", schema_id=request.schema_id, error=str(e))
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "error": "Unresolvable schema reference",
+                "message": f"{e}. Only references within the schema are supported; remote schemas are not fetched",
+                "type": "validation"
+            }
+        )
+    except Exception as e:
+        logger.error("Validate request failed", error=str(e), exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "error": "Processing error",
+                "message": str(e),
+                "type": "server"
+            }
+        )
+
+    log_response_payload(response_data, "validate_response")
+
+    logger.info("Validate request completed",
+                valid=response_data["valid"],
+                cache=validator_cache.stats(),
+                success=True)
+    return response_data
+
+@router.get("/validate/schemas")
+@profile_in_threadpool
+def list_schemas_endpoint():
+    """List the ids of registered schemas"""
+    schema_ids = list_registered_schemas()
+    logger.info("Registered schemas listed", count=len(schema_ids))
+    return {"schemas": schema_ids, "count": len(schema_ids)}
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+from jsonschema import ValidationError as SchemaValidationError
+from jsonschema.validators import validator_for
+from jsonschema_specifications import REGISTRY as METASCHEMA_REGISTRY
+from referencing import Registry, Resource
+from referencing.jsonschema import DRAFT202012
+from app.cache_utils import LRUCache
+from app.logging_config import logger
+from app.pointer_utils import to_json_pointer
+
+# Compiled validators keyed by schema hash and registry generation
+validator_cache = LRUCache(int(os.getenv('SCHEMA_CACHE_SIZE', '64')))
+
+# Registered schemas keyed by id: (file mtime, schema, schema hash)
+_registered_schemas: Dict[str, Tuple[int, Any, str]] = {}
+
+# $ref registry of the registered schemas: (SCHEMA_DIR state, generation, registry)
+_schema_registry: Tuple[Tuple[Tuple[str, int], ...], int, Registry] = ((), 0, METASCHEMA_REGISTRY)
+
+SCHEMA_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.-]+$')
+
+class SchemaNotFoundError(LookupError):
+    """Raised when a registered schema id does not exist"""
+
+def get_schema_dir() -> str:
+    """Directory holding registered schemas as <schema_id>.json files"""
+    return os.getenv('SCHEMA_DIR', 'schemas')
+
+def compute_schema_hash(schema: Union[Dict[str, Any], bool]) -> str:
+    """Hash a schema by its canonical JSON form so equal schemas share a validator"""
+    canonical = json.dumps(schema, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def list_registered_schemas() -> List[str]:
+    """Return the ids of all registered schemas"""
+    schema_dir = get_schema_dir()
+    if not os.path.isdir(schema_dir):
+        return []
+    return sorted(
+        name[:-len('.json')] for name in os.listdir(schema_dir)
+        if name.endswith('.json') and SCHEMA_ID_PATTERN.match(name[:-len('.json')])
+    )
+
+def load_registered_schema(schema_id: str) -> Tuple[Any, str]:
+    """
+    Load a registered schema by id
+
+    Args:
+        schema_id: Schema file name without the .json extension
+
+    Returns:
+        Tuple of (schema, schema hash)
+
+    Raises:
+        SchemaNotFoundError: If no schema is registered under schema_id
+        ValueError: If the schema file is not valid JSON
+    """
+    if not SCHEMA_ID_PATTERN.match(schema_id):
+        raise SchemaNotFoundError(f"Unknown schema id: {schema_id}")
+
+    schema_path = os.path.join(get_schema_dir(), f"{schema_id}.json")
+    try:
+        mtime = os.stat(schema_path).st_mtime_ns
+    except OSError:
+        raise SchemaNotFoundError(f"Unknown schema id: {schema_id}")
+
+    # Reuse the parsed schema until the file changes on disk
+    cached = _registered_schemas.get(schema_id)
+    if cached and cached[0] == mtime:
+        return cached[1], cached[2]
+
+    try:
+        with open(schema_path, encoding='utf-8') as schema_file:
+            schema = json.load(schema_file)
+    except json.JSONDecodeError as e:
+        logger.error("Registered schema is not valid JSON", schema_id=schema_id, error=str(e))
+        raise ValueError(f"Registered schema '{schema_id}' is not valid JSON: {e.msg} at position {e.pos}")
+
+    schema_hash = compute_schema_hash(schema)
+    _registered_schemas[schema_id] = (mtime, schema, schema_hash)
+    logger.debug("Registered schema loaded", schema_id=schema_id, schema_hash=schema_hash)
+    return schema, schema_hash
+
+def get_schema_registry() -> Tuple[Registry, int]:
+    """
+    Registry resolving $ref to the draft meta-schemas and to registered schemas by $id
+
+    The registry is rebuilt whenever a file in SCHEMA_DIR is added, removed or
+    modified. Registered schemas without an $id, or whose file is invalid,
+    are left out.
+
+    Returns:
+        Tuple of (registry, generation), where generation changes on every rebuild
+    """
+    global _schema_registry
+    state = _schema_dir_state()
+    cached_state, generation, registry = _schema_registry
+    if state == cached_state:
+        return registry, generation
+
+    resources = {}
+    for schema_id, _ in state:
+        try:
+            schema, _ = load_registered_schema(schema_id)
+            resource = Resource.from_contents(schema, default_specification=DRAFT202012)
+        except (SchemaNotFoundError, ValueError) as e:
+            logger.warning("Registered schema left out of the $ref registry", schema_id=schema_id, error=str(e))
+            continue
+        uri = resource.id()
+        if not uri:
+            continue
+        if uri in resources:
+            logger.warning("Duplicate registered schema $id", schema_id=schema_id, id=uri)
+            continue
+        resources[uri] = resource
+
+    registry = METASCHEMA_REGISTRY.with_resources(resources.items())
+    _schema_registry = (state, generation + 1, registry)
+    logger.debug("Schema registry rebuilt", schemas=len(state), ids=len(resources))
+    return registry, generation + 1
+
+def _schema_dir_state() -> Tuple[Tuple[str, int], ...]:
+    """Registered schema ids with their file modification times"""
+    schema_dir = get_schema_dir()
+    state = []
+    for schema_id in list_registered_schemas():
+        try:
+            state.append((schema_id, os.stat(os.path.join(schema_dir, f"{schema_id}.json")).st_mtime_ns))
+        except OSError:
+            continue
+    return tuple(state)
+
+def get_validator(schema: Union[Dict[str, Any], bool], schema_hash: Optional[str] = None) -> Any:
+    """
+    Return a compiled validator for schema, compiling it on a cache miss
+
+    The validator class is picked from the schema's $schema keyword (latest draft
+    by default) and format checking is enabled. $ref resolves within the schema
+    itself, to the bundled draft meta-schemas and to registered schemas by
+    their $id; remote references are never fetched and raise
+    referencing.exceptions.Unresolvable on validation.
+
+    Raises:
+        jsonschema.SchemaError: If the schema itself is invalid
+    """
+    if schema_hash is None:
+        schema_hash = compute_schema_hash(schema)
+
+    # Validators hold the registry, so a change to the registered schemas recompiles them
+    registry, generation = get_schema_registry()
+    cache_key = (schema_hash, generation)
+    validator = validator_cache.get(cache_key)
+    if validator is not None:
+        return validator
+
+    validator_class = validator_for(schema)
+    validator_class.check_schema(schema)
+    validator = validator_class(
+        schema,
+        format_checker=validator_class.FORMAT_CHECKER,
+        registry=registry
+    )
+    validator_cache.put(cache_key, validator)
+
+    logger.debug("Schema validator compiled",
+                schema_hash=schema_hash,
+                validator=validator_class.__name__,
+                cache_size=len(validator_cache))
+    return validator
+
+def format_validation_error(error: SchemaValidationError) -> Dict[str, Any]:
+    """Describe a validation error with JSON Pointer locations"""
+    return {
+        "pointer": to_json_pointer(error.absolute_path),
+        "schema_pointer": to_json_pointer(error.absolute_schema_path),
+        "validator": error.validator,
+        "message": error.message
+    }
+
+def validate_document(validator: Any, document: Any, fail_fast: bool = False, max_errors: int = 100) -> Dict[str, Any]:
+    """
+    Validate a document with a compiled validator
+
+    Args:
+        validator: Validator returned by get_validator
+        document: JSON data to validate
+        fail_fast: Stop at the first error instead of collecting all of them
+        max_errors: Upper bound on the number of errors collected
+
+    Returns:
+        Dictionary with validity, formatted errors and whether errors were truncated
+    """
+    limit = 1 if fail_fast else max_errors
+    errors = []
+    truncated = False
+
+    # iter_errors is lazy, so stopping early skips the rest of the document
+    for error in validator.iter_errors(document):
+        if len(errors) >= limit:
+            truncated = not fail_fast
+            break
+        errors.append(format_validation_error(error))
+        if fail_fast:
+            break
+
+    return {
+        "valid": not errors,
+        "errors": errors,
+        "error_count": len(errors),
+        "truncated": truncated
+    }
@@ -0,0 +1,478 @@
+#!/usr/bin/env python
+"""
+JSON Toolkit - Load Testing Harness
+
+Replays a captured request log, or synthesizes a mix of /format, /convert
+(every output format) and /query requests, against the backend at a target
+rate or concurrency. Reports latency percentiles, throughput and error rates
+per endpoint, plus the server's resident memory (RSS) over time.
+
+By default a local uvicorn server is started for the run and stopped
+afterwards; use --url to target a server that is already running.
+
+Examples:
+    python scripts/load_test.py --concurrency 16 --duration 30 --workers 2
+    python scripts/load_test.py --rate 200 --duration 60 --doc-size 500
+    python scripts/load_test.py --replay capture.jsonl --url http://localhost:8000
+
+Capture files are JSON Lines, one request per line:
+    {"method": "POST", "path": "/convert", "params": {"format": "xml"},
+     "headers": {"content-type": "application/json"}, "body": {...}}
+"body" is sent as JSON; use "body_text" to send a raw string instead.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("httpx is required: pip install -r requirements.txt")
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONVERT_FORMATS = ["json", "xml", "csv", "yaml", "msgpack", "cbor"]
+QUERY_PATHS = ["$.users[*].name", "$..city", "$.users[0]", "$.users[*].address.city"]
+
+@dataclass
+class PlannedRequest:
+    """A request ready to send, with its body already encoded"""
+    label: str
+    method: str
+    path: str
+    params: Dict[str, str] = field(default_factory=dict)
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+@dataclass
+class EndpointStats:
+    """Latencies and failures collected for one request label"""
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    status_codes: Dict[int, int] = field(default_factory=dict)
+
+def make_document(size: int, rng: random.Random) -> Dict[str, Any]:
+    """Build a synthetic document with `size` nested user records"""
+    cities = ["NYC", "LA", "Chicago", "Houston", "Phoenix"]
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "users": [
+            {
+                "id": i,
+                "name": f"user{i}",
+                "email": f"user{i}@example.com",
+                "age": rng.randint(18, 80),
+                "active": rng.random() < 0.8,
+                "address": {"street": f"{rng.randint(1, 999)} Main St", "city": rng.choice(cities)},
+                "tags": rng.sample(["a", "b", "c", "d", "e"], 2)
+            }
+            for i in range(size)
+        ]
+    }
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse 'format=1,convert=3,query=1' into endpoint weights"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ("format", "convert", "query"):
+            raise argparse.ArgumentTypeError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight or 1)
+    return weights
+
+def synthesize_requests(count: int, mix: Dict[str, float], doc_size: int, seed: int) -> List[PlannedRequest]:
+    """Build a pool of requests following the endpoint mix"""
+    rng = random.Random(seed)
+    # A few document sizes so the mix includes small and large payloads
+    documents = [make_document(max(1, size), rng) for size in (doc_size // 10, doc_size, doc_size * 4)]
+    encoded = [json.dumps(document).encode("utf-8") for document in documents]
+    json_headers = {"content-type": "application/json"}
+
+    endpoints = list(mix)
+    weights = [mix[name] for name in endpoints]
+    planned = []
+    for _ in range(count):
+        endpoint = rng.choices(endpoints, weights)[0]
+        index = rng.randrange(len(documents))
+        if endpoint == "format":
+            planned.append(PlannedRequest("POST /format", "POST", "/format", headers=json_headers, body=encoded[index]))
+        elif endpoint == "convert":
+            output_format = rng.choice(CONVERT_FORMATS)
+            planned.append(PlannedRequest(
+                f"POST /convert?format={output_format}", "POST", "/convert",
+                params={"format": output_format}, headers=json_headers, body=encoded[index]
+            ))
+        else:
+            body = json.dumps({"root": documents[index], "path": rng.choice(QUERY_PATHS)}).encode("utf-8")
+            planned.append(PlannedRequest("POST /query", "POST", "/query", headers=json_headers, body=body))
+    return planned
+
+def load_capture(path: str) -> List[PlannedRequest]:
+    """Load requests from a JSON Lines capture file, skipping unusable lines"""
+    planned = []
+    skipped = 0
+    with open(path, encoding="utf-8") as capture:
+        for line in capture:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                skipped += 1
+                continue
+            if not isinstance(entry, dict) or "path" not in entry:
+                skipped += 1
+                continue
+
+            headers = {k.lower(): str(v) for k, v in (entry.get("headers") or {}).items()}
+            if "body_text" in entry:
+                body = str(entry["body_text"]).encode("utf-8")
+            elif "body" in entry:
+                body = json.dumps(entry["body"]).encode("utf-8")
+                headers.setdefault("content-type", "application/json")
+            else:
+                body = b""
+            params = {k: str(v) for k, v in (entry.get("params") or {}).items()}
+            method = str(entry.get("method", "POST")).upper()
+            label = f"{method} {entry['path']}"
+            if "format" in params:
+                label += f"?format={params['format']}"
+            planned.append(PlannedRequest(label, method, entry["path"], params, headers, body))
+
+    if skipped:
+        print(f"Skipped {skipped} capture line(s) without a usable request", file=sys.stderr)
+    if not planned:
+        sys.exit(f"No replayable requests in {path}")
+    return planned
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """Resident memory in bytes of a process and all of its descendants"""
+    try:
+        import psutil
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+            return sum(process.memory_info().rss for process in processes)
+        except psutil.Error:
+            return None
+    except ImportError:
+        pass
+
+    # Fall back to /proc on Linux
+    total = 0
+    pending = [pid]
+    found = False
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+                        found = True
+                        break
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+    return total if found else None
+
+def find_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int, workers: int, log_path: Optional[str]) -> subprocess.Popen:
+    """Start uvicorn serving app.main:app from the repository root"""
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--no-access-log"
+    ]
+    output = open(log_path, "ab") if log_path else subprocess.DEVNULL
+    env = dict(os.environ, LOG_PAYLOADS="false")
+    return subprocess.Popen(command, cwd=REPO_ROOT, stdout=output, stderr=subprocess.STDOUT, env=env)
+
+async def wait_until_ready(client: httpx.AsyncClient, base_url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            response = await client.get(f"{base_url}/")
+            if response.status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready within {timeout:.0f}s")
+
+class LoadTest:
+    """Drives requests against a server and collects statistics"""
+
+    def __init__(self, args: argparse.Namespace, base_url: str, requests: List[PlannedRequest],
+                 server_pid: Optional[int]):
+        self.args = args
+        self.base_url = base_url
+        self.requests = requests
+        self.server_pid = server_pid
+        self.stats: Dict[str, EndpointStats] = {}
+        self.rss_samples: List[Dict[str, float]] = []
+        self.sent = 0
+        self.started_at = 0.0
+        self.finished_at = 0.0
+
+    def next_request(self) -> Optional[PlannedRequest]:
+        if self.args.requests and self.sent >= self.args.requests:
+            return None
+        if time.monotonic() - self.started_at >= self.args.duration:
+            return None
+        planned = self.requests[self.sent % len(self.requests)]
+        self.sent += 1
+        return planned
+
+    async def send(self, client: httpx.AsyncClient, planned: PlannedRequest, scheduled_at: float) -> None:
+        stats = self.stats.setdefault(planned.label, EndpointStats())
+        try:
+            response = await client.request(
+                planned.method, f"{self.base_url}{planned.path}",
+                params=planned.params, headers=planned.headers, content=planned.body
+            )
+            # Read the full body so streamed responses are timed to completion
+            await response.aread()
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        latency = time.monotonic() - scheduled_at
+        stats.latencies.append(latency)
+        stats.status_codes[status] = stats.status_codes.get(status, 0) + 1
+        if not 200 <= status < 300:
+            stats.errors += 1
+
+    async def run_closed_loop(self, client: httpx.AsyncClient) -> None:
+        """Each of `concurrency` workers sends its next request as soon as the last one finishes"""
+        async def worker():
+            while True:
+                planned = self.next_request()
+                if planned is None:
+                    return
+                await self.send(client, planned, time.monotonic())
+
+        await asyncio.gather(*(worker() for _ in range(self.args.concurrency)))
+
+    async def run_open_loop(self, client: httpx.AsyncClient) -> None:
+        """
+        Send requests at a fixed arrival rate regardless of response times
+
+        Latency is measured from each request's scheduled start, so time spent
+        queued behind a slow server is counted rather than hidden.
+        """
+        interval = 1.0 / self.args.rate
+        in_flight = asyncio.Semaphore(self.args.max_in_flight)
+        tasks = set()
+        next_at = time.monotonic()
+
+        async def fire(planned: PlannedRequest, scheduled_at: float):
+            async with in_flight:
+                await self.send(client, planned, scheduled_at)
+
+        while True:
+            planned = self.next_request()
+            if planned is None:
+                break
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            task = asyncio.create_task(fire(planned, next_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += interval
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    async def sample_rss(self, stop: asyncio.Event) -> None:
+        while not stop.is_set():
+            rss = process_tree_rss(self.server_pid)
+            if rss is not None:
+                self.rss_samples.append({
+                    "t": round(time.monotonic() - self.started_at, 2),
+                    "rss_mb": round(rss / (1024 * 1024), 1)
+                })
+            try:
+                await asyncio.wait_for(stop.wait(), self.args.rss_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self) -> None:
+        limits = httpx.Limits(max_connections=max(self.args.concurrency, self.args.max_in_flight))
+        async with httpx.AsyncClient(timeout=self.args.timeout, limits=limits) as client:
+            if self.args.url is None:
+                await wait_until_ready(client, self.base_url, self.args.startup_timeout)
+
+            stop_sampling = asyncio.Event()
+            self.started_at = time.monotonic()
+            sampler = None
+            if self.server_pid is not None:
+                sampler = asyncio.create_task(self.sample_rss(stop_sampling))
+
+            if self.args.rate:
+                await self.run_open_loop(client)
+            else:
+                await self.run_closed_loop(client)
+
+            self.finished_at = time.monotonic()
+            stop_sampling.set()
+            if sampler:
+                await sampler
+
+    def report(self) -> Dict[str, Any]:
+        elapsed = max(self.finished_at - self.started_at, 1e-9)
+        endpoints = {}
+        all_latencies = []
+        total_errors = 0
+        for label in sorted(self.stats):
+            stats = self.stats[label]
+            latencies = sorted(stats.latencies)
+            all_latencies.extend(latencies)
+            total_errors += stats.errors
+            endpoints[label] = summarize(latencies, stats.errors, elapsed)
+            endpoints[label]["status_codes"] = {str(code): count for code, count in sorted(stats.status_codes.items())}
+        all_latencies.sort()
+
+        report = {
+            "mode": f"open loop at {self.args.rate} req/s" if self.args.rate else f"closed loop with {self.args.concurrency} workers",
+            "elapsed_s": round(elapsed, 2),
+            "overall": summarize(all_latencies, total_errors, elapsed),
+            "endpoints": endpoints
+        }
+        if self.rss_samples:
+            rss_values = [sample["rss_mb"] for sample in self.rss_samples]
+            report["server_rss_mb"] = {
+                "start": rss_values[0],
+                "peak": max(rss_values),
+                "end": rss_values[-1],
+                "samples": self.rss_samples
+            }
+        return report
+
+def summarize(sorted_latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    count = len(sorted_latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "throughput_rps": round(count / elapsed, 2),
+        "p50_ms": to_ms(percentile(sorted_latencies, 50)),
+        "p95_ms": to_ms(percentile(sorted_latencies, 95)),
+        "p99_ms": to_ms(percentile(sorted_latencies, 99)),
+        "max_ms": to_ms(sorted_latencies[-1]) if sorted_latencies else 0.0
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"\nMode: {report['mode']}, elapsed {report['elapsed_s']}s")
+    header = f"{'endpoint':<30} {'reqs':>7} {'err%':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"
+    print(header)
+    print("-" * len(header))
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["overall"])]
+    for label, row in rows:
+        print(f"{label:<30} {row['requests']:>7} {row['error_rate'] * 100:>5.1f}% {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>7.1f}ms {row['p95_ms']:>7.1f}ms {row['p99_ms']:>7.1f}ms {row['max_ms']:>7.1f}ms")
+
+    rss = report.get("server_rss_mb")
+    if rss:
+        print(f"\nServer RSS: start {rss['start']} MB, peak {rss['peak']} MB, end {rss['end']} MB")
+        step = max(1, len(rss["samples"]) // 10)
+        timeline = ", ".join(f"{s['t']:.0f}s={s['rss_mb']}MB" for s in rss["samples"][::step])
+        print(f"RSS over time: {timeline}")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay or synthesize mixed traffic against the JSON Toolkit backend")
+    target = parser.add_argument_group("target")
+    target.add_argument("--url", help="Base URL of a running server (default: start a local one)")
+    target.add_argument("--workers", type=int, default=1, help="uvicorn worker processes for the local server")
+    target.add_argument("--port", type=int, help="Port for the local server (default: a free port)")
+    target.add_argument("--server-pid", type=int, help="PID to sample RSS from when using --url")
+    target.add_argument("--server-log", help="File to append local server output to")
+    target.add_argument("--startup-timeout", type=float, default=30.0)
+
+    traffic = parser.add_argument_group("traffic")
+    traffic.add_argument("--replay", help="JSON Lines capture to replay instead of synthesized traffic")
+    traffic.add_argument("--mix", type=parse_mix, default=parse_mix("format=1,convert=3,query=1"),
+                         help="Endpoint weights for synthesized traffic (default: format=1,convert=3,query=1)")
+    traffic.add_argument("--doc-size", type=int, default=100, help="User records in the medium synthesized document")
+    traffic.add_argument("--seed", type=int, default=0)
+
+    load = parser.add_argument_group("load")
+    mode = load.add_mutually_exclusive_group()
+    mode.add_argument("--concurrency", type=int, default=8, help="Closed-loop workers (default 8)")
+    mode.add_argument("--rate", type=float, help="Open-loop arrival rate in requests/second")
+    load.add_argument("--max-in-flight", type=int, default=256, help="Cap on outstanding requests in open-loop mode")
+    load.add_argument("--duration", type=float, default=30.0, help="Seconds to run (default 30)")
+    load.add_argument("--requests", type=int, help="Stop after this many requests")
+    load.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+
+    output = parser.add_argument_group("output")
+    output.add_argument("--rss-interval", type=float, default=1.0, help="Seconds between server RSS samples")
+    output.add_argument("--json-out", help="Write the full report as JSON to this file")
+    return parser.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.rate is not None and args.rate <= 0:
+        sys.exit("--rate must be positive")
+
+    if args.replay:
+        planned = load_capture(args.replay)
+    else:
+        planned = synthesize_requests(1000, args.mix, args.doc_size, args.seed)
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+        server_pid = args.server_pid
+    else:
+        port = args.port or find_free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = start_server(port, args.workers, args.server_log)
+        server_pid = server.pid
+        print(f"Started local server on {base_url} with {args.workers} worker(s) (pid {server_pid})")
+
+    load_test = LoadTest(args, base_url, planned, server_pid)
+    try:
+        asyncio.run(load_test.run())
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+
+    report = load_test.report()
+    print_report(report)
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as output:
+            json.dump(report, output, indent=2)
+        print(f"\nReport written to {args.json_out}")
+    return 1 if report["overall"]["requests"] == 0 else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
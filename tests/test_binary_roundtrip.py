@@ -0,0 +1,81 @@
+import json
+import cbor2
+import msgpack
+import pytest
+
+# Exercises nesting, unicode, floats, negatives, empty containers and nulls
+DOCUMENT = {
+    "users": [
+        {"id": 1, "name": "Ada", "email": "ada@example.com", "tags": ["admin", "ops"], "score": 98.5},
+        {"id": 2, "name": "Zoë ✓", "email": None, "tags": [], "score": -0.25},
+        {"id": 3, "name": "Grace", "email": "grace@example.com", "tags": ["dev"], "score": 1e21}
+    ],
+    "meta": {"count": 3, "active": True, "nested": {"empty": {}, "big": 2 ** 63 - 1, "small": -2 ** 63}}
+}
+
+ENCODERS = {
+    "msgpack": ("application/msgpack", lambda data: msgpack.packb(data, use_bin_type=True)),
+    "cbor": ("application/cbor", cbor2.dumps)
+}
+
+DECODERS = {
+    "msgpack": lambda body: msgpack.unpackb(body, raw=False),
+    "cbor": cbor2.loads
+}
+
+def post_encoded(client, url, data, encoding):
+    """POST data as JSON or in a binary encoding"""
+    if encoding == "json":
+        return client.post(url, content=json.dumps(data), headers={"Content-Type": "application/json"})
+    content_type, encode = ENCODERS[encoding]
+    return client.post(url, content=encode(data), headers={"Content-Type": content_type})
+
+@pytest.mark.parametrize("encoding", ["msgpack", "cbor"])
+def test_format_matches_json_request(client, encoding):
+    expected = post_encoded(client, "/format", DOCUMENT, "json")
+    actual = post_encoded(client, "/format", DOCUMENT, encoding)
+    assert expected.status_code == actual.status_code == 200
+    assert actual.json() == expected.json()
+
+@pytest.mark.parametrize("encoding", ["msgpack", "cbor"])
+@pytest.mark.parametrize("output_format", ["json", "xml", "csv", "yaml"])
+def test_convert_matches_json_request(client, encoding, output_format):
+    url = f"/convert?format={output_format}"
+    expected = post_encoded(client, url, DOCUMENT, "json")
+    actual = post_encoded(client, url, DOCUMENT, encoding)
+    assert expected.status_code == actual.status_code == 200
+    assert actual.json() == expected.json()
+
+@pytest.mark.parametrize("encoding", ["msgpack", "cbor"])
+@pytest.mark.parametrize("path", ["$.users[*].name", "$..score", "$.meta.nested"])
+def test_query_matches_json_request(client, encoding, path):
+    request = {"root": DOCUMENT, "path": path}
+    expected = post_encoded(client, "/query", request, "json")
+    actual = post_encoded(client, "/query", request, encoding)
+    assert expected.status_code == actual.status_code == 200
+    assert actual.json() == expected.json()
+
+@pytest.mark.parametrize("input_encoding", ["json", "msgpack", "cbor"])
+@pytest.mark.parametrize("output_format", ["msgpack", "cbor"])
+def test_binary_output_decodes_to_input(client, input_encoding, output_format):
+    response = post_encoded(client, f"/convert?format={output_format}", DOCUMENT, input_encoding)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ENCODERS[output_format][0]
+    assert DECODERS[output_format](response.content) == DOCUMENT
+
+@pytest.mark.parametrize("value", [2 ** 64, -2 ** 63 - 1, [1, {"deep": 10 ** 30}]])
+def test_msgpack_output_rejects_out_of_range_integers(client, value):
+    response = post_encoded(client, "/convert?format=msgpack", {"value": value}, "json")
+    assert response.status_code == 422
+    assert response.json()["detail"]["message"] == "integer out of MessagePack range"
+
+def test_cbor_output_keeps_big_integers(client):
+    document = {"value": 10 ** 30, "negative": -10 ** 30}
+    response = post_encoded(client, "/convert?format=cbor", document, "json")
+    assert response.status_code == 200
+    assert cbor2.loads(response.content) == document
+
+def test_query_rejects_invalid_utf8(client):
+    response = client.post("/query", content=b'{"root": "\xff", "path": "$"}', headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["type"] == "validation"
@@ -0,0 +1,118 @@
+import json
+import os
+import cbor2
+import pytest
+import yaml
+from app import cli
+from app.cli_utils import expand_inputs, load_document, output_path, process_file
+
+DOCUMENT = {"users": [{"id": 1, "name": "Ada"}, {"id": 2, "name": "Grace"}]}
+
+@pytest.fixture
+def tree(tmp_path):
+    """Input directory with nested, binary, unrelated and previously written files"""
+    (tmp_path / "nested" / "deeper").mkdir(parents=True)
+    files = {
+        "a.json": json.dumps(DOCUMENT),
+        "b.JSON": "[1, 2]",
+        "nested/c.json": "{}",
+        "nested/deeper/d.json": "true",
+        "notes.txt": "not an input",
+        "a.formatted.json": "{}",
+        "a.query.json": "[]",
+        "nested/c.Formatted.json": "{}"
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_text(content)
+    (tmp_path / "e.cbor").write_bytes(cbor2.dumps(DOCUMENT))
+    return tmp_path
+
+def relative(paths, root):
+    return [os.path.relpath(path, root) for path in paths]
+
+def test_expand_directory_skips_previous_outputs(tree):
+    assert relative(expand_inputs([str(tree)]), tree) == [
+        "a.json", "b.JSON", "e.cbor", "nested/c.json", "nested/deeper/d.json"
+    ]
+
+def test_expand_glob_skips_previous_outputs(tree):
+    assert relative(expand_inputs([str(tree / "*.json")]), tree) == ["a.json"]
+    assert relative(expand_inputs([str(tree / "**" / "*.json")]), tree) == [
+        "a.json", "nested/c.json", "nested/deeper/d.json"
+    ]
+
+def test_expand_keeps_explicit_files_and_deduplicates(tree):
+    paths = expand_inputs([str(tree / "a.formatted.json"), str(tree / "a.json"), str(tree)])
+    assert relative(paths, tree).count("a.json") == 1
+    assert "a.formatted.json" in relative(paths, tree)
+
+@pytest.mark.parametrize("command, output_format, name", [
+    ("format", "json", "a.formatted.json"),
+    ("convert", "json", "a.formatted.json"),
+    ("convert", "yaml", "a.yaml"),
+    ("convert", "msgpack", "a.msgpack"),
+    ("query", "json", "a.query.json")
+])
+def test_output_path(command, output_format, name):
+    assert output_path("in/a.json", command, output_format) == os.path.join("in", name)
+    assert output_path("in/a.json", command, output_format, "out") == os.path.join("out", name)
+
+def test_output_collision_is_rejected(tree, tmp_path, capsys):
+    # Both inputs would write c.formatted.json into the same output directory
+    (tree / "c.json").write_text("{}")
+    code = cli.main(["format", str(tree / "c.json"), str(tree / "nested" / "c.json"), "-o", str(tmp_path / "out"), "-w", "1"])
+    assert code == 2
+    assert "same output file" in capsys.readouterr().err
+    assert list((tmp_path / "out").iterdir()) == []
+
+def test_rerun_does_not_process_its_own_output(tree, capsys):
+    assert cli.main(["format", str(tree), "-w", "1", "-q"]) == 0
+    assert cli.main(["format", str(tree), "-w", "1", "-q"]) == 0
+    assert not (tree / "a.formatted.formatted.json").exists()
+    assert json.loads((tree / "a.formatted.json").read_text()) == DOCUMENT
+
+@pytest.mark.parametrize("name, content, error", [
+    ("bad.json", "{", "Invalid JSON"),
+    ("bad_utf8.json", b"\xff\xfe", "Invalid UTF-8"),
+    ("bad.cbor", b"\xff", "Invalid cbor data"),
+    ("data.txt", "{}", "Unsupported input extension")
+])
+def test_process_file_reports_failures(tmp_path, name, content, error):
+    path = tmp_path / name
+    path.write_bytes(content if isinstance(content, bytes) else content.encode())
+    target = tmp_path / "out.json"
+    options = {"command": "format", "format": "json", "path": None, "mmap_threshold": 1}
+    result = process_file((str(path), str(target), options))
+    assert error in result["error"]
+    assert result["output_bytes"] == 0
+    assert result["seconds"] >= 0
+    assert not target.exists()
+
+def test_process_file_reports_missing_input(tmp_path):
+    options = {"command": "format", "format": "json", "path": None, "mmap_threshold": 1}
+    result = process_file((str(tmp_path / "missing.json"), str(tmp_path / "out.json"), options))
+    assert result["error"]
+
+def test_process_file_reports_conversion_failure(tmp_path):
+    path = tmp_path / "big.json"
+    path.write_text(json.dumps({"n": 2 ** 70}))
+    options = {"command": "convert", "format": "msgpack", "path": None, "mmap_threshold": 1}
+    result = process_file((str(path), str(tmp_path / "big.msgpack"), options))
+    assert result["error"] == "integer out of MessagePack range"
+
+def test_failures_are_printed_and_set_exit_code(tree, capsys):
+    (tree / "broken.json").write_text("{")
+    assert cli.main(["convert", str(tree), "-f", "yaml", "-w", "2"]) == 1
+    captured = capsys.readouterr()
+    assert f"FAILED {tree / 'broken.json'}" in captured.err
+    assert "5/6 files" in captured.out
+    assert yaml.safe_load((tree / "a.yaml").read_text()) == DOCUMENT
+
+@pytest.mark.parametrize("name", ["a.json", "e.cbor"])
+def test_memory_mapped_load_matches_plain_read(tree, name):
+    assert load_document(str(tree / name), mmap_threshold=1) == load_document(str(tree / name), mmap_threshold=1 << 30)
+
+def test_query_command(tree):
+    assert cli.main(["query", str(tree / "a.json"), "-p", "$.users[*].name", "-w", "1", "-q"]) == 0
+    assert json.loads((tree / "a.query.json").read_text()) == ["Ada", "Grace"]
+    assert cli.main(["query", str(tree / "a.json"), "-p", "$.[", "-w", "1"]) == 2
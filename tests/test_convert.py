@@ -0,0 +1,215 @@
+import json
+import random
+import xml.dom.minidom
+import xml.etree.ElementTree as ET
+import pytest
+from dicttoxml import dicttoxml
+from app.convert_utils import convert_to_xml, render_xml, unflatten_dict
+
+YAML_WITH_DATES = """\
+id: 1
+created: 2024-01-02
+updated: 2024-01-02T10:30:00Z
+2024-05-05: key that is a date
+"""
+
+def test_yaml_timestamps_stay_strings_in_single_document(client):
+    response = client.post("/convert/to-json?input_format=yaml", content=YAML_WITH_DATES)
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": 1,
+        "created": "2024-01-02",
+        "updated": "2024-01-02T10:30:00Z",
+        "2024-05-05": "key that is a date"
+    }
+
+def test_yaml_timestamps_stay_strings_across_documents(client):
+    documents = "---\n".join([YAML_WITH_DATES, "when: 2001-12-14 21:59:43.10 -5\n", "plain: 2\n"])
+    response = client.post("/convert/to-json?input_format=yaml", content=documents)
+    assert response.status_code == 200
+    data = json.loads(response.text)
+    assert len(data) == 3
+    assert data[0]["created"] == "2024-01-02"
+    assert data[1] == {"when": "2001-12-14 21:59:43.10 -5"}
+    assert data[2] == {"plain": 2}
+
+def to_json(client, body, input_format, **params):
+    query = "&".join(f"{name}={value}" for name, value in {"input_format": input_format, **params}.items())
+    return client.post(f"/convert/to-json?{query}", content=body)
+
+def test_csv_to_json_keeps_text_by_default(client):
+    response = to_json(client, "id,name,score\n1,Ada,9.5\n2,,\n", "csv")
+    assert response.status_code == 200
+    assert response.json() == [{"id": "1", "name": "Ada", "score": "9.5"}, {"id": "2", "name": "", "score": ""}]
+
+def test_csv_to_json_infers_column_types(client):
+    body = "id,score,active,note,huge\n1,2,true,x,1e999\n2,2.5,FALSE,,3\n3,,,7,\n"
+    response = to_json(client, body, "csv", infer_types="true")
+    assert response.json() == [
+        {"id": 1, "score": 2.0, "active": True, "note": "x", "huge": "1e999"},
+        {"id": 2, "score": 2.5, "active": False, "note": "", "huge": 3.0},
+        {"id": 3, "score": None, "active": None, "note": "7", "huge": None}
+    ]
+
+def test_csv_inference_uses_only_sampled_rows(client):
+    response = to_json(client, "n\n1\n2\nx\n", "csv", infer_types="true", infer_rows=2)
+    assert [row["n"] for row in response.json()] == [1, 2, "x"]
+
+def test_csv_to_json_unflattens_headers(client):
+    body = "id,address.city,address.geo.lat,items[0].sku,items[1].sku,tags[1]\n1,Oslo,59.9,X1,X2,b\n"
+    response = to_json(client, body, "csv", infer_types="true")
+    assert response.json() == [{
+        "id": 1,
+        "address": {"city": "Oslo", "geo": {"lat": 59.9}},
+        "items": [{"sku": "X1"}, {"sku": "X2"}],
+        "tags": [None, "b"]
+    }]
+    flat = to_json(client, body, "csv", unflatten="false").json()
+    assert flat[0]["address.city"] == "Oslo"
+
+def test_csv_drop_empty(client):
+    response = to_json(client, "a,b.c,b.d\n1,,2\n", "csv", drop_empty="true")
+    assert response.json() == [{"a": "1", "b": {"d": "2"}}]
+
+def test_csv_huge_index_stays_flat(client):
+    # Indexes are capped by the number of columns
+    response = to_json(client, "a[20000000],a[0],b[2],c[4]\nw,x,y,z\n", "csv")
+    assert response.json() == [{"a[20000000]": "w", "a": ["x"], "b": [None, None, "y"], "c[4]": "z"}]
+
+@pytest.mark.parametrize("flat, expected", [
+    ({"a.b": "1", "a": "2"}, {"a.b": "1", "a": "2"}),
+    ({"a": "2", "a.b": "1"}, {"a": "2", "a.b": "1"}),
+    ({"a.b": "1", "a.b.c": "2"}, {"a": {"b": "1"}, "a.b.c": "2"}),
+    ({"a.b.c": "2", "a.b": "1"}, {"a": {"b": {"c": "2"}}, "a.b": "1"}),
+    ({"a[0]": "1", "a.x": "2"}, {"a": ["1"], "a.x": "2"}),
+    ({"a[1]": None, "a[1].b": 1}, {"a": [None, None], "a[1].b": 1}),
+    ({"a[1].b": 1, "a[1]": None}, {"a": [None, {"b": 1}], "a[1]": None}),
+    ({"": "1", ".a": "2", "[0]": "3", "a..b": "4"}, {"": "1", ".a": "2", "[0]": "3", "a..b": "4"})
+])
+def test_unflatten_never_drops_conflicting_keys(flat, expected):
+    assert unflatten_dict(flat, max_index=4) == expected
+
+def test_unflatten_caps_array_indexes():
+    assert unflatten_dict({"a[1]": 1, "a[2]": 2}) == {"a": [None, 1], "a[2]": 2}
+    assert unflatten_dict({"a[5]": 1}, max_index=10) == {"a": [None] * 5 + [1]}
+
+def test_xml_to_json_records(client):
+    body = (
+        '<?xml version="1.0" ?><root>'
+        '<item><id>1</id><tags><item>a</item><item>b</item></tags></item>'
+        '<item id="7">text</item>'
+        '<user><name>Ada</name><role>x</role><role>y</role></user>'
+        '</root>'
+    )
+    response = to_json(client, body, "xml", infer_types="true")
+    assert response.status_code == 200
+    assert response.json() == [
+        {"id": 1, "tags": ["a", "b"]},
+        {"@id": "7", "#text": "text"},
+        {"user": {"name": "Ada", "role": ["x", "y"]}}
+    ]
+
+def test_xml_round_trips_converter_output(client):
+    document = [{"id": 1, "name": "Ada"}, {"id": 2, "name": "Grace"}]
+    markup = client.post("/convert?format=xml&raw=true", json=document).text
+    response = client.post("/convert/to-json?infer_types=true", content=markup, headers={"Content-Type": "application/xml"})
+    assert response.json() == document
+
+def test_to_json_streams_large_input(client):
+    rows = "".join(f"{i},name{i}\n" for i in range(20000))
+    response = to_json(client, "id,name\n" + rows, "csv", infer_types="true")
+    data = response.json()
+    assert len(data) == 20000
+    assert data[-1] == {"id": 19999, "name": "name19999"}
+
+@pytest.mark.parametrize("body, input_format", [
+    ("<root><a>1</a><bad>", "xml"),
+    ("<root><item>1</item><item><x></item></root>", "xml"),
+    ("a: [1\n", "yaml"),
+    ("a: 1\n---\nb: [\n", "yaml"),
+    (b"a,b\n1,\xff\n", "csv")
+])
+def test_malformed_input_in_first_chunk_is_422(client, body, input_format):
+    response = to_json(client, body, input_format)
+    assert response.status_code == 422
+    assert response.json()["detail"]["error"] == f"Invalid {input_format.upper()}"
+
+def test_malformed_input_after_first_chunk_aborts_stream(client):
+    body = "<root>" + "<item>1</item>" * 20000 + "<bad></root>"
+    # The response has already started, so the error can only abort it
+    with pytest.raises(ET.ParseError):
+        to_json(client, body, "xml")
+
+@pytest.mark.parametrize("body", [
+    "data: !!binary aGVsbG8=\n",
+    "value: .nan\n",
+    "- .inf\n",
+    "a: 1\n---\nb: !!binary aGVsbG8=\n",
+    "? [a, b]\n: 1\n"
+])
+def test_yaml_values_without_json_equivalent_are_422(client, body):
+    response = to_json(client, body, "yaml")
+    assert response.status_code == 422
+    assert response.json()["detail"]["error"] == "Invalid YAML"
+
+def test_yaml_scalar_keys_become_strings(client):
+    response = to_json(client, "responses:\n  200: ok\n  true: yes\n", "yaml")
+    assert response.json() == {"responses": {"200": "ok", "true": True}}
+
+def test_input_format_from_content_type(client):
+    response = client.post("/convert/to-json", content="a: 1\n", headers={"Content-Type": "application/x-yaml"})
+    assert response.json() == {"a": 1}
+    response = client.post("/convert/to-json", content="a: 1\n", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 400
+
+XML_KEYS = ["a", "b", "name", "1", "2.5", "my key", "a&b", "x'y", "<t>", "", "item", "-1", " 7", "é", "ns:tag", "123abc", "_z"]
+STRINGS = ["", "plain", "a & b", "<x>", "q\"uote", "it's", "ünï", "tab\tx", "1e5", "]]>", "a: b", "multi\nline",
+           " lead", "yes", "null", "x" * 90, ("word " * 30).strip(), "- dash", "{b}"]
+SCALARS = [None, True, False, 0, -3, 1.5, 1e20, -0.0, 2 ** 70]
+
+def random_document(rng, keys, depth=0, pool=None):
+    """Random document in which earlier subtrees are sometimes copied again"""
+    pool = [] if pool is None else pool
+    roll = rng.random()
+    if depth > 3 or roll < 0.35:
+        return rng.choice(SCALARS + STRINGS)
+    if pool and rng.random() < 0.35:
+        return json.loads(json.dumps(rng.choice(pool)))
+    if roll < 0.7:
+        value = {rng.choice(keys): random_document(rng, keys, depth + 1, pool) for _ in range(rng.randint(0, 4))}
+    else:
+        value = [random_document(rng, keys, depth + 1, pool) for _ in range(rng.randint(0, 4))]
+    pool.append(value)
+    return value
+
+def records(count, repeated=True):
+    """Records with identical address and line-item blocks, or with every block unique"""
+    return json.loads(json.dumps([{
+        "id": i,
+        "name": f"user{i}",
+        "address": {"street": "1 Main St" if repeated else f"{i} Main St", "city": "Springfield", "geo": {"lat": 1.5}},
+        "items": [{"sku": "X1", "qty": 1}, {"sku": "X2", "qty": 2 if repeated else i}]
+    } for i in range(count)]))
+
+SHARED = {"k": [1, {"x": True}]}
+
+@pytest.mark.parametrize("document", [
+    records(50), records(50, repeated=False), {"root": records(5)}, [], {}, [[]], [SHARED, {"s": SHARED}, SHARED],
+    {"a b": {"1": [None, True, 1.5]}, "item": [{"item": "x"}]}
+])
+def test_render_xml_matches_dicttoxml(document):
+    expected = dicttoxml(document, custom_root="root", attr_type=False).decode("utf-8")
+    assert render_xml(document) == expected
+
+def test_render_xml_matches_dicttoxml_on_random_documents():
+    rng = random.Random(35)
+    for _ in range(500):
+        document = random_document(rng, XML_KEYS)
+        expected = dicttoxml(document, custom_root="root", attr_type=False).decode("utf-8")
+        assert render_xml(document) == expected
+
+def test_convert_to_xml_matches_dicttoxml_pretty_print():
+    document = records(20)
+    markup = dicttoxml(document, custom_root="root", attr_type=False).decode("utf-8")
+    pretty = xml.dom.minidom.parseString(markup).toprettyxml(indent="  ")
+    assert convert_to_xml(document) == "\n".join(line for line in pretty.split("\n") if line.strip())
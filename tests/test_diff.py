@@ -0,0 +1,139 @@
+import copy
+import json
+import random
+import pytest
+from app.diff_utils import diff_json
+from app.pointer_utils import parse_json_pointer
+
+def apply_patch(document, patch):
+    """Apply an RFC 6902 patch using add, remove, replace and move"""
+    document = copy.deepcopy(document)
+
+    def parent_of(path):
+        tokens = parse_json_pointer(path)
+        parent = document
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        return parent, tokens[-1]
+
+    def remove(path):
+        parent, token = parent_of(path)
+        return parent.pop(int(token) if isinstance(parent, list) else token)
+
+    def add(path, value):
+        nonlocal document
+        if path == "":
+            document = value
+            return
+        parent, token = parent_of(path)
+        if isinstance(parent, list):
+            parent.insert(len(parent) if token == "-" else int(token), value)
+        else:
+            parent[token] = value
+
+    for operation in patch:
+        op, path = operation["op"], operation["path"]
+        if op == "add":
+            add(path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            remove(path)
+        elif op == "replace":
+            if path != "":
+                remove(path)
+            add(path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            add(path, remove(operation["from"]))
+        else:
+            raise AssertionError(f"Unexpected operation {op}")
+    return document
+
+def canonical(value):
+    """Type-strict comparison form, so 1, 1.0 and True differ"""
+    return json.dumps(value, sort_keys=True)
+
+def assert_patch_reaches_target(source, target):
+    result = diff_json(source, target, max_operations=100000)
+    assert not result["truncated"]
+    assert canonical(apply_patch(source, result["patch"])) == canonical(target)
+    return result
+
+@pytest.mark.parametrize("source, target", [
+    # CPython hashes ints modulo 2**61 - 1
+    ({"id": 1}, {"id": 2305843009213693952}),
+    ([{"n": 0}], [{"n": 2305843009213693951}]),
+    # hash(-1) == hash(-2)
+    ({"a": [-1]}, {"a": [-2]}),
+    # Swapping values between keys keeps a sum of pair hashes unchanged
+    ({"a": 1, "b": 2}, {"a": 2, "b": 1}),
+    ({"x": {"a": "p", "b": "q"}}, {"x": {"a": "q", "b": "p"}}),
+    ([[1, 2], [3, 4]], [[1, 4], [3, 2]]),
+    # Equal in Python, different in JSON
+    ({"v": [1]}, {"v": [1.0]}),
+    ({"v": [1]}, {"v": [True]}),
+    ({"v": [0]}, {"v": [False]}),
+])
+def test_collision_prone_changes_are_detected(source, target):
+    result = assert_patch_reaches_target(source, target)
+    assert result["operation_count"] > 0
+
+def test_identical_documents_give_empty_patch(client):
+    document = {"users": [{"id": 1, "tags": ["a", "b"]}, {"id": 2, "tags": []}], "n": 1.5}
+    response = client.post("/diff", json={"source": document, "target": copy.deepcopy(document)})
+    assert response.status_code == 200
+    assert response.json()["identical"] is True
+    assert response.json()["patch"] == []
+
+def test_large_int_change_is_not_identical(client):
+    response = client.post("/diff", json={"source": {"id": 1}, "target": {"id": 2305843009213693952}})
+    assert response.status_code == 200
+    assert response.json()["identical"] is False
+
+SCALARS = [0, 1, -1, -2, 2, 1.0, 0.5, True, False, None, "", "a", "b", 2305843009213693952, 2 ** 64]
+KEYS = ["a", "b", "c", "id", "x~y", "p/q"]
+
+def random_value(rng, depth=0):
+    kind = rng.random()
+    if depth >= 3 or kind < 0.4:
+        return rng.choice(SCALARS)
+    if kind < 0.7:
+        return {key: random_value(rng, depth + 1) for key in rng.sample(KEYS, rng.randint(0, 4))}
+    if rng.random() < 0.3:
+        ids = rng.sample(range(8), rng.randint(1, 5))
+        return [{"id": i, "v": random_value(rng, depth + 1)} for i in ids]
+    return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))]
+
+def mutate(rng, value, depth=0):
+    """Return a copy of value with a few random edits, swaps and reorders"""
+    roll = rng.random()
+    if roll < 0.1 or depth >= 4:
+        return random_value(rng, depth)
+    if isinstance(value, dict):
+        result = {key: mutate(rng, child, depth + 1) if rng.random() < 0.5 else copy.deepcopy(child)
+                  for key, child in value.items()}
+        if len(result) >= 2 and rng.random() < 0.3:
+            first, second = rng.sample(list(result), 2)
+            result[first], result[second] = result[second], result[first]
+        if rng.random() < 0.2:
+            result[rng.choice(KEYS)] = random_value(rng, depth + 1)
+        if result and rng.random() < 0.2:
+            del result[rng.choice(list(result))]
+        return result
+    if isinstance(value, list):
+        result = [mutate(rng, child, depth + 1) if rng.random() < 0.3 else copy.deepcopy(child) for child in value]
+        if rng.random() < 0.3:
+            rng.shuffle(result)
+        if rng.random() < 0.2:
+            result.insert(rng.randint(0, len(result)), random_value(rng, depth + 1))
+        if result and rng.random() < 0.2:
+            result.pop(rng.randrange(len(result)))
+        return result
+    return rng.choice(SCALARS) if roll < 0.5 else value
+
+def test_random_patches_reach_target():
+    rng = random.Random(6902)
+    for _ in range(5000):
+        source = random_value(rng)
+        target = mutate(rng, source)
+        result = assert_patch_reaches_target(source, target)
+        if canonical(source) == canonical(target):
+            assert result["patch"] == []
@@ -0,0 +1,59 @@
+import pstats
+import pytest
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    monkeypatch.setenv("PROFILING_ENABLED", "true")
+    monkeypatch.setenv("PROFILE_DIR", str(tmp_path))
+    monkeypatch.setenv("PROFILE_TOKEN", "secret")
+    return tmp_path
+
+AUTHORIZED = {"X-Profile-Token": "secret"}
+
+def profiled_functions(profile_dir, response):
+    """Names of all functions recorded in the profile saved for response"""
+    profile_path = profile_dir / f"{response.headers['X-Profile-Id']}.prof"
+    return {name for _, _, name in pstats.Stats(str(profile_path)).stats}
+
+def test_sync_endpoint_is_profiled(client, profiling):
+    response = client.post("/diff", headers={"X-Profile": "1", **AUTHORIZED},
+                           json={"source": {"a": [1, 2]}, "target": {"a": [2, 1]}})
+    assert response.status_code == 200
+    assert {"diff_json", "_diff_arrays"} <= profiled_functions(profiling, response)
+
+def test_sync_streaming_iterator_is_profiled(client, profiling):
+    rows = [{"id": i, "name": f"user{i}"} for i in range(50)]
+    response = client.post("/convert?format=csv&raw=true", headers={"X-Profile": "1", **AUTHORIZED}, json=rows)
+    assert response.status_code == 200
+    assert response.text.startswith("id,name")
+    assert "iter_csv_chunks" in profiled_functions(profiling, response)
+
+@pytest.mark.parametrize("url, status_code", [("/convert?format=json", 200), ("/convert?format=nope", 400)])
+def test_inline_profile_keeps_status_code(client, profiling, url, status_code):
+    response = client.post(url, headers={"X-Profile": "inline", **AUTHORIZED}, json={"a": 1})
+    assert response.status_code == status_code
+    assert response.json()["profile"]["status_code"] == status_code
+
+@pytest.mark.parametrize("headers", [
+    {"X-Profile": "inline,alloc"},
+    {"X-Profile": "inline,alloc", "X-Profile-Token": "wrong"},
+    {"X-Profile": "1", "X-Profile-Token": ""}
+])
+def test_profile_header_requires_token(client, profiling, headers):
+    response = client.post("/convert?format=json", headers=headers, json={"a": 1})
+    assert response.status_code == 200
+    assert "profile" not in response.json()
+    assert "X-Profile-Id" not in response.headers
+    assert list(profiling.iterdir()) == []
+
+def test_profile_header_ignored_without_configured_token(client, profiling, monkeypatch):
+    monkeypatch.delenv("PROFILE_TOKEN")
+    response = client.post("/convert?format=json", headers={"X-Profile": "inline", "X-Profile-Token": ""}, json={"a": 1})
+    assert "profile" not in response.json()
+
+def test_sampled_profiles_need_no_token(client, profiling, monkeypatch):
+    monkeypatch.delenv("PROFILE_TOKEN")
+    monkeypatch.setenv("PROFILE_SAMPLE_RATE", "1")
+    response = client.post("/convert?format=json", json={"a": 1})
+    assert response.json()["format"] == "json"
+    assert "X-Profile-Id" in response.headers
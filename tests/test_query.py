@@ -0,0 +1,24 @@
+import asyncio
+from app import query_routes
+
+def test_query_runs_off_the_event_loop(client, monkeypatch):
+    loops = []
+    original = query_routes.query_json_path
+
+    def recording_query(data, path):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return original(data, path)
+
+    monkeypatch.setattr(query_routes, "query_json_path", recording_query)
+    response = client.post("/query", json={"root": {"users": [{"name": "Ada"}, {"name": "Grace"}]}, "path": "$.users[*].name"})
+    assert response.status_code == 200
+    assert response.json()["results"] == ["Ada", "Grace"]
+    assert loops == [None]
+
+def test_query_reports_invalid_paths(client):
+    response = client.post("/query", json={"root": {"a": 1}, "path": "$.["})
+    assert response.status_code == 422
+    assert response.json()["detail"]["error"] == "Invalid JSONPath expression"
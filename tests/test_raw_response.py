@@ -0,0 +1,88 @@
+import pytest
+from app import convert_utils
+
+ROWS = [{"id": 1, "name": "Ada"}, {"id": 2, "name": "Grace"}]
+
+def vary(response):
+    return {value.strip() for value in response.headers.get("vary", "").split(",") if value.strip()}
+
+@pytest.mark.parametrize("accept, media_type", [
+    ("text/csv", "text/csv"),
+    ("application/csv", "text/csv"),
+    ("text/csv;q=0.9, application/json;q=0.5", "text/csv"),
+    ("application/json;q=0.1, text/*;q=0.2, text/csv", "text/csv")
+])
+def test_accept_selects_raw_body(client, accept, media_type):
+    response = client.post("/convert?format=csv", headers={"Accept": accept}, json=ROWS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith(media_type)
+    assert response.text.splitlines() == ["id,name", "1,Ada", "2,Grace"]
+    assert "Accept" in vary(response)
+
+@pytest.mark.parametrize("accept", [
+    None,
+    "application/json",
+    "application/json, text/csv",
+    "application/json;q=0.8, text/csv;q=0.8",
+    "application/json;q=0.9, text/csv;q=0.5",
+    "text/csv;q=0",
+    "text/csv;q=abc",
+    "*/*"
+])
+def test_envelope_unless_raw_is_preferred(client, accept):
+    headers = {"Accept": accept} if accept else {}
+    response = client.post("/convert?format=csv", headers=headers, json=ROWS)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["format"] == "csv"
+    assert "Accept" in vary(response)
+
+@pytest.mark.parametrize("format, accept, media_type", [
+    ("xml", "application/xml", "application/xml"),
+    ("xml", "text/xml", "application/xml"),
+    ("yaml", "application/x-yaml", "application/yaml")
+])
+def test_raw_xml_and_yaml(client, format, accept, media_type):
+    response = client.post(f"/convert?format={format}", headers={"Accept": accept}, json=ROWS)
+    assert response.headers["content-type"].startswith(media_type)
+    enveloped = client.post(f"/convert?format={format}", json=ROWS).json()["converted_data"]
+    assert response.text == enveloped
+
+def test_raw_false_forces_envelope(client):
+    response = client.post("/convert?format=csv&raw=false", headers={"Accept": "text/csv"}, json=ROWS)
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["converted_data"].splitlines()[0] == "id,name"
+    # The flag decides, so the response does not depend on Accept
+    assert "Accept" not in vary(response)
+
+def test_raw_true_without_accept(client):
+    response = client.post("/convert?format=json&raw=true", json=ROWS)
+    assert response.json() == ROWS
+    assert "Accept" not in vary(response)
+
+def test_json_is_never_negotiated(client):
+    response = client.post("/convert?format=json", headers={"Accept": "application/json"}, json=ROWS)
+    assert response.json()["format"] == "json"
+    assert "Accept" not in vary(response)
+
+def test_vary_keeps_origin(client):
+    response = client.post("/convert?format=csv", headers={"Accept": "text/csv", "Origin": "http://localhost:5173"}, json=ROWS)
+    assert {"Accept", "Origin"} <= vary(response)
+
+def test_raw_xml_conversion_error_is_500(client):
+    # Control characters cannot appear in XML 1.0, so the pretty-printer rejects them
+    response = client.post("/convert?format=xml&raw=true", json={"a": "\u0001"})
+    assert response.status_code == 500
+    assert response.json()["detail"]["error"] == "Processing error"
+    # The envelope keeps reporting the error inline
+    enveloped = client.post("/convert?format=xml", json={"a": "\u0001"})
+    assert enveloped.json()["converted_data"].startswith("Error converting to XML")
+
+def test_raw_yaml_conversion_error_is_500(client, monkeypatch):
+    def failing_dump(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(convert_utils.yaml, "dump", failing_dump)
+    response = client.post("/convert?format=yaml", headers={"Accept": "application/yaml"}, json=ROWS)
+    assert response.status_code == 500
+    assert "boom" in response.json()["detail"]["message"]
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import pytest
+from app import tree_utils
+from app.cache_utils import LRUCache
+
+@pytest.fixture
+def small_store(monkeypatch):
+    store = LRUCache(32, max_weight=4 * 1024 * 1024)
+    monkeypatch.setattr(tree_utils, "document_store", store)
+    return store
+
+def test_store_is_weighted_by_parsed_size(client, small_store):
+    records = [{"id": i, "name": f"user{i}", "tags": ["a", "b"], "address": {"city": "NYC"}} for i in range(5000)]
+    body = json.dumps(records)
+    response = client.post("/tree", content=body)
+    assert response.status_code == 200
+    estimated = response.json()["summary"]["estimated_memory_bytes"]
+    # Small objects take several times their serialized size once parsed
+    assert estimated > 3 * len(body)
+    assert small_store.total_weight == estimated
+
+def test_document_larger_than_store_is_not_kept(client, small_store):
+    # Fits the byte limit as JSON but not once parsed
+    records = [{"id": i, "v": [i, i + 1]} for i in range(60000)]
+    body = json.dumps(records)
+    assert len(body) < small_store.max_weight
+    response = client.post("/tree", content=body)
+    assert response.status_code == 200
+    assert response.json()["stored"] is False
+    assert response.json()["document_id"] is None
+
+DOCUMENT = {
+    "users": [{"id": i, "name": f"user{i}", "tags": ["a"] if i % 2 else []} for i in range(25)],
+    "meta": {"a/b": 1, "m~n": 2.5, "flag": True, "none": None, "long": "x" * 300},
+    "": "empty key"
+}
+
+@pytest.fixture
+def document_id(client, small_store):
+    response = client.post("/tree", content=json.dumps(DOCUMENT))
+    assert response.status_code == 200
+    return response.json()["document_id"]
+
+def test_upload_returns_summary_and_root_view(client, small_store):
+    data = client.post("/tree", content=json.dumps(DOCUMENT)).json()
+    assert data["stored"] is True
+    summary = data["summary"]
+    assert summary["max_depth"] == 4
+    # root + users + 25 users with 3 fields and a tags array + 12 tags + meta with 5 fields + ""
+    assert summary["node_count"] == 1 + 1 + 25 * 4 + 12 + 1 + 5 + 1
+    assert summary["type_histogram"] == {
+        "object": 27, "array": 26, "integer": 26, "string": 39, "number": 1, "boolean": 1, "null": 1
+    }
+    assert summary["largest_arrays"][0] == {"pointer": "/users", "length": 25}
+    assert len(summary["largest_arrays"]) == 10
+    assert summary["estimated_memory_bytes"] > 0
+    root = data["node"]
+    assert (root["pointer"], root["type"], root["child_count"]) == ("", "object", 3)
+    assert root["child_types"] == {"array": 1, "object": 1, "string": 1}
+    assert [child["pointer"] for child in root["children"]] == ["/users", "/meta", "/"]
+
+def test_pointer_resolution(client, document_id):
+    meta = client.get(f"/tree/{document_id}", params={"pointer": "/meta"}).json()
+    assert [child["pointer"] for child in meta["children"]] == ["/meta/a~1b", "/meta/m~0n", "/meta/flag", "/meta/none", "/meta/long"]
+    assert client.get(f"/tree/{document_id}", params={"pointer": "/meta/a~1b"}).json()["value"] == 1
+    assert client.get(f"/tree/{document_id}", params={"pointer": "/meta/m~0n"}).json()["value"] == 2.5
+    assert client.get(f"/tree/{document_id}", params={"pointer": "/"}).json()["value"] == "empty key"
+    long_value = client.get(f"/tree/{document_id}", params={"pointer": "/meta/long", "preview_length": 10}).json()
+    assert long_value == {"pointer": "/meta/long", "type": "string", "value": "x" * 10, "truncated": True, "length": 300}
+    assert client.get(f"/tree/{document_id}", params={"pointer": "/users/3/tags/0"}).json()["value"] == "a"
+
+@pytest.mark.parametrize("pointer", ["users", "/missing", "/users/25", "/users/01", "/users/-1", "/users/-",
+                                     "/users/²", "/users/١", "/users/1/name/x", "/users/ 1"])
+def test_unresolvable_pointer_is_404(client, document_id, pointer):
+    response = client.get(f"/tree/{document_id}", params={"pointer": pointer})
+    assert response.status_code == 404
+    assert response.json()["detail"]["error"] == "Pointer not found"
+
+def test_paging(client, document_id):
+    pages = [
+        client.get(f"/tree/{document_id}", params={"pointer": "/users", "offset": offset, "limit": 10}).json()
+        for offset in (0, 10, 20)
+    ]
+    assert [child["key"] for page in pages for child in page["children"]] == list(range(25))
+    assert [page["has_more"] for page in pages] == [True, True, False]
+    assert all(page["child_types"] == {"object": 25} for page in pages)
+    assert pages[0]["children"][0] == {"key": 0, "pointer": "/users/0", "type": "object", "child_count": 3}
+    exact = client.get(f"/tree/{document_id}", params={"pointer": "/users", "offset": 15, "limit": 10}).json()
+    assert exact["has_more"] is False
+    past_end = client.get(f"/tree/{document_id}", params={"pointer": "/users", "offset": 50}).json()
+    assert past_end["children"] == []
+    assert past_end["has_more"] is False
+    meta = client.get(f"/tree/{document_id}", params={"pointer": "/meta", "offset": 1, "limit": 2}).json()
+    assert [child["key"] for child in meta["children"]] == ["m~n", "flag"]
+    assert meta["has_more"] is True
+
+def test_child_types_counted_once_per_pointer(client, document_id, monkeypatch):
+    calls = []
+    original = tree_utils.count_child_types
+    monkeypatch.setattr(tree_utils, "count_child_types", lambda node: calls.append(1) or original(node))
+    monkeypatch.setattr(tree_utils, "child_types_cache", LRUCache(16))
+    for offset in (0, 5, 10, 15):
+        client.get(f"/tree/{document_id}", params={"pointer": "/users", "offset": offset, "limit": 5})
+    assert len(calls) == 1
+
+def test_summary_endpoint(client, document_id):
+    summary = client.get(f"/tree/{document_id}/summary").json()
+    assert summary["largest_arrays"][0] == {"pointer": "/users", "length": 25}
+
+def test_unknown_document_is_404(client):
+    assert client.get("/tree/0123456789abcdef").status_code == 404
+    assert client.get("/tree/0123456789abcdef/summary").status_code == 404
+
+@pytest.mark.parametrize("body, status_code, error", [
+    (b"\xff\xfe{}", 400, "Invalid encoding"),
+    (b'{"a": }', 422, "Invalid JSON")
+])
+def test_invalid_upload(client, small_store, body, status_code, error):
+    response = client.post("/tree", content=body)
+    assert response.status_code == status_code
+    assert response.json()["detail"]["error"] == error
+
+def test_upload_runs_off_the_event_loop(client, small_store, monkeypatch):
+    loops = []
+    original = tree_utils.summarize_document
+
+    def recording_summary(document):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+        return original(document)
+
+    monkeypatch.setattr(tree_utils, "summarize_document", recording_summary)
+    assert client.post("/tree", content='{"fresh": 1}').status_code == 200
+    assert loops == [None]
@@ -0,0 +1,194 @@
+import http.server
+import json
+import os
+import threading
+import pytest
+from app import validate_utils
+from app.cache_utils import LRUCache
+
+@pytest.fixture
+def schema_server():
+    """Local HTTP server that records every schema fetch"""
+    requests = []
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            body = b'{"type": "string"}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+def test_remote_ref_is_not_fetched(client, schema_server):
+    base_url, requests = schema_server
+    response = client.post("/validate", json={
+        "document": 1,
+        "schema": {"$ref": f"{base_url}/remote.json"}
+    })
+    assert response.status_code == 422
+    assert response.json()["detail"]["error"] == "Unresolvable schema reference"
+    assert requests == []
+
+def test_local_ref_resolves(client):
+    response = client.post("/validate", json={
+        "document": {"id": "abc"},
+        "schema": {
+            "$defs": {"id": {"type": "integer"}},
+            "properties": {"id": {"$ref": "#/$defs/id"}}
+        }
+    })
+    assert response.status_code == 200
+    assert response.json()["errors"][0]["pointer"] == "/id"
+
+def test_metaschema_ref_resolves_offline(client):
+    response = client.post("/validate", json={
+        "document": {"type": 3},
+        "schema": {"$ref": "https://json-schema.org/draft/2020-12/schema"}
+    })
+    assert response.status_code == 200
+    assert response.json()["valid"] is False
+
+PERSON_SCHEMA = {
+    "type": "object",
+    "properties": {"name": {"type": "string"}, "age": {"type": "integer", "minimum": 0}},
+    "required": ["name"]
+}
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    """Small validator cache that starts empty"""
+    cache = LRUCache(2)
+    monkeypatch.setattr(validate_utils, "validator_cache", cache)
+    return cache
+
+def test_validator_cache_hits_and_evicts(client, fresh_cache):
+    schemas = [{"type": "string"}, {"type": "integer"}, {"type": "boolean"}]
+    assert client.post("/validate", json={"document": "a", "schema": schemas[0]}).json()["valid"] is True
+    assert client.post("/validate", json={"document": "a", "schema": schemas[0]}).json()["valid"] is True
+    assert (fresh_cache.hits, fresh_cache.misses, len(fresh_cache)) == (1, 1, 1)
+
+    # Key order does not matter, the schema is hashed canonically
+    client.post("/validate", json={"document": 1, "schema": {"minimum": 0, "type": "integer"}})
+    client.post("/validate", json={"document": 1, "schema": {"type": "integer", "minimum": 0}})
+    assert fresh_cache.hits == 2
+
+    for schema in schemas[1:]:
+        client.post("/validate", json={"document": 1, "schema": schema})
+    assert len(fresh_cache) == 2
+    misses = fresh_cache.misses
+    client.post("/validate", json={"document": "a", "schema": schemas[0]})
+    assert fresh_cache.misses == misses + 1
+
+def test_fail_fast_stops_at_first_error(client):
+    document = {"age": -1, "extra": 1}
+    collected = client.post("/validate", json={"document": document, "schema": PERSON_SCHEMA}).json()
+    assert collected["error_count"] == 2
+    assert collected["truncated"] is False
+    assert {error["validator"] for error in collected["errors"]} == {"required", "minimum"}
+
+    fast = client.post("/validate", json={"document": document, "schema": PERSON_SCHEMA, "mode": "fail_fast"}).json()
+    assert fast["valid"] is False
+    assert fast["error_count"] == 1
+    assert fast["truncated"] is False
+    assert fast["mode"] == "fail_fast"
+
+def test_max_errors_truncates(client):
+    response = client.post("/validate", json={
+        "document": list(range(10)),
+        "schema": {"items": {"type": "string"}},
+        "max_errors": 3
+    })
+    data = response.json()
+    assert data["error_count"] == 3
+    assert data["truncated"] is True
+    assert [error["pointer"] for error in data["errors"]] == ["/0", "/1", "/2"]
+
+def test_batch_documents(client):
+    response = client.post("/validate", json={
+        "documents": [{"name": "Ada"}, {"age": 3}, {"name": 5, "age": "x"}],
+        "schema": PERSON_SCHEMA
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["valid"], data["document_count"], data["valid_count"], data["invalid_count"]) == (False, 3, 1, 2)
+    assert [result["index"] for result in data["results"]] == [0, 1, 2]
+    assert [result["error_count"] for result in data["results"]] == [0, 1, 2]
+
+@pytest.mark.parametrize("payload", [
+    {"schema": {"type": "string"}},
+    {"document": 1, "documents": [1], "schema": {"type": "string"}},
+    {"document": 1},
+    {"document": 1, "schema": {"type": "string"}, "schema_id": "person"}
+])
+def test_exactly_one_document_and_schema(client, payload):
+    response = client.post("/validate", json=payload)
+    assert response.status_code == 422
+    assert response.json()["detail"]["error"] == "Invalid input"
+
+@pytest.fixture
+def schema_dir(tmp_path, monkeypatch):
+    """Empty SCHEMA_DIR; write registered schemas with write_schema"""
+    monkeypatch.setenv("SCHEMA_DIR", str(tmp_path))
+    return tmp_path
+
+def write_schema(schema_dir, schema_id, schema):
+    path = schema_dir / f"{schema_id}.json"
+    path.write_text(json.dumps(schema))
+    # Give every write a distinct mtime so the change is noticed
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + len(json.dumps(schema)) * 1000))
+
+def test_schema_id_lookup(client, schema_dir):
+    write_schema(schema_dir, "person", PERSON_SCHEMA)
+    assert client.get("/validate/schemas").json() == {"schemas": ["person"], "count": 1}
+    response = client.post("/validate", json={"document": {"name": 1}, "schema_id": "person"})
+    assert response.status_code == 200
+    assert response.json()["errors"][0]["pointer"] == "/name"
+
+@pytest.mark.parametrize("schema_id", ["missing", "../person", "a/b"])
+def test_unknown_schema_id_is_404(client, schema_dir, schema_id):
+    write_schema(schema_dir, "person", PERSON_SCHEMA)
+    response = client.post("/validate", json={"document": {}, "schema_id": schema_id})
+    assert response.status_code == 404
+    assert response.json()["detail"]["error"] == "Schema not found"
+
+def test_registered_schemas_ref_each_other_by_id(client, schema_dir):
+    write_schema(schema_dir, "address", {
+        "$id": "https://schemas.example.com/address.json",
+        "type": "object",
+        "properties": {"city": {"type": "string"}},
+        "required": ["city"]
+    })
+    write_schema(schema_dir, "customer", {
+        "$id": "https://schemas.example.com/customer.json",
+        "properties": {"address": {"$ref": "address.json"}}
+    })
+    response = client.post("/validate", json={"documents": [{"address": {"city": "Oslo"}}, {"address": {}}], "schema_id": "customer"})
+    assert response.status_code == 200
+    assert [result["valid"] for result in response.json()["results"]] == [True, False]
+
+    # Inline schemas can reference registered ones by absolute $id
+    inline = {"$ref": "https://schemas.example.com/address.json"}
+    assert client.post("/validate", json={"document": {}, "schema": inline}).json()["valid"] is False
+
+    # Editing a registered schema is picked up by validators that reference it
+    write_schema(schema_dir, "address", {"$id": "https://schemas.example.com/address.json", "type": "object"})
+    assert client.post("/validate", json={"document": {}, "schema": inline}).json()["valid"] is True
+
+def test_invalid_registered_schema_does_not_break_others(client, schema_dir):
+    (schema_dir / "broken.json").write_text("{")
+    write_schema(schema_dir, "person", PERSON_SCHEMA)
+    assert client.post("/validate", json={"document": {"name": "Ada"}, "schema_id": "person"}).json()["valid"] is True
+    assert client.post("/validate", json={"document": {}, "schema_id": "broken"}).status_code == 500